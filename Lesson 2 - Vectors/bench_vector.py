@@ -0,0 +1,111 @@
+# Benchmark of the compact Vector against the original dict-based Vector.
+#
+#   python bench_vector.py [number_of_vectors]
+#
+# Reports the memory held per Vector object and the latency of the operations
+# that build new vectors (__add__, __sub__, scalar_mult, __round__) over a
+# workload of 1M vectors by default.
+
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from decimal import Decimal
+
+from vector import Vector
+
+
+class DictVector(object):
+    # the original Vector layout: a per-instance __dict__ and a constructor that
+    # re-converts every coordinate of every intermediate result to Decimal
+
+    def __init__(self, coordinates):
+        if not coordinates:
+            raise ValueError('The coordinates must be nonempty')
+        self.coordinates = tuple(Decimal(x) for x in coordinates)
+        self.dimension = len(coordinates)
+
+    def scalar_mult(self, c):
+        x = []
+        for e in self.coordinates:
+            x.append(Decimal(c) * e)
+        return DictVector(x)
+
+    def __add__(self, other):
+        result = []
+        for i in range(self.dimension):
+            result.append(self.coordinates[i] + other.coordinates[i])
+        return DictVector(result)
+
+    def __sub__(self, other):
+        result = []
+        for i in range(self.dimension):
+            result.append(self.coordinates[i] - other.coordinates[i])
+        return DictVector(result)
+
+    def __round__(self, n=None):
+        rounded = []
+        for i in range(self.dimension):
+            rounded.append(round(self.coordinates[i], n))
+        return DictVector(rounded)
+
+
+def measure_memory(cls, rows):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    vectors = [cls(r) for r in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(vectors), vectors
+
+
+def measure_latency(vectors):
+    timings = {}
+    others = vectors[1:] + vectors[:1]
+
+    start = time.perf_counter()
+    for v, w in zip(vectors, others):
+        v + w
+    timings['__add__'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for v, w in zip(vectors, others):
+        v - w
+    timings['__sub__'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for v in vectors:
+        v.scalar_mult(3)
+    timings['scalar_mult'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for v in vectors:
+        round(v, 3)
+    timings['__round__'] = time.perf_counter() - start
+
+    return timings
+
+
+def main(n):
+    rows = [(Decimal(i) / 7, Decimal(i % 13) / 3, Decimal(-i) / 11) for i in range(n)]
+    print('workload: {} vectors of dimension 3\n'.format(n))
+
+    results = {}
+    for name, cls in (('dict Vector', DictVector), ('slots Vector', Vector)):
+        bytes_per_vector, vectors = measure_memory(cls, deepcopy(rows))
+        results[name] = bytes_per_vector, measure_latency(vectors)
+        del vectors
+
+    old_mem, old_times = results['dict Vector']
+    new_mem, new_times = results['slots Vector']
+
+    print('{:<14}{:>14}{:>14}{:>10}'.format('', 'dict Vector', 'slots Vector', 'ratio'))
+    print('{:<14}{:>12.0f} B{:>12.0f} B{:>9.2f}x'.format('memory/obj', old_mem, new_mem, old_mem / new_mem))
+    for op in old_times:
+        old_ns = old_times[op] / n * 1e9
+        new_ns = new_times[op] / n * 1e9
+        print('{:<14}{:>11.0f} ns{:>11.0f} ns{:>9.2f}x'.format(op, old_ns, new_ns, old_ns / new_ns))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,253 @@
+import math
+import struct
+from array import array
+
+from vector_batch import VectorBatch
+
+STL_HEADER_SIZE = 80
+STL_TRIANGLE = struct.Struct('<12fH')   # normal, three vertices, attribute byte count
+
+
+class Mesh(object):
+
+    INVALID_FACE_INDEX_MSG = 'Face refers to a vertex that does not exist'
+    VERTICES_MUST_BE_3D_MSG = 'The vertices of a mesh must be 3-dimensional'
+
+    # -----------------------------------------------------------------------------
+    # Mesh(vertices, faces):
+    #   A triangle mesh stored as a VectorBatch of 3-dimensional vertices and a flat
+    #   array of vertex indices, three per face.
+    #
+    # Arguments:
+    #   vertices: VectorBatch of dimension 3 (or a list of Vectors / coordinates)
+    #   faces: flat iterable of vertex indices or a list of (i, j, k) triples
+    def __init__(self, vertices, faces):
+        if not isinstance(vertices, VectorBatch):
+            vertices = VectorBatch.from_vectors(vertices)
+        if vertices.dimension != 3:
+            raise Exception(self.VERTICES_MUST_BE_3D_MSG)
+        self.vertices = vertices
+
+        flat = array('q')
+        for f in faces:
+            if isinstance(f, int):
+                flat.append(f)
+            else:
+                flat.extend(f)
+        self.faces = flat
+
+        try:
+            assert len(flat) % 3 == 0
+            assert not flat or (min(flat) >= 0 and max(flat) < len(vertices))
+
+        except AssertionError:
+            raise Exception(self.INVALID_FACE_INDEX_MSG)
+
+    # -----------------------------------------------------------------------------
+    # triangle_coordinates(self):
+    #   Gather the vertex coordinates of every face: 9 values per triangle
+    #   (x, y, z of the first, second and third vertex).
+    #
+    # Returns:
+    #   array('d') of length 9 * number of faces
+    def triangle_coordinates(self):
+        v = self.vertices.data
+        coords = array('d')
+        for i in self.faces:
+            coords.extend(v[3 * i:3 * i + 3])
+        return coords
+
+    def cross_products(self):
+        return triangle_cross_products(self.triangle_coordinates())
+
+    def face_areas(self):
+        return triangle_areas(self.triangle_coordinates())
+
+    def surface_area(self):
+        return math.fsum(self.face_areas())
+
+    def __len__(self):
+        return len(self.faces) // 3
+
+
+# -----------------------------------------------------------------------------
+# triangle_cross_products(coords):
+#   For each triangle (a, b, c) compute (b - a) x (c - a), the cross product of its
+#   two edge vectors, in a single pass over the packed coordinates.
+#
+# Arguments:
+#   coords: array('d') holding 9 values per triangle
+#
+# Returns:
+#   VectorBatch of dimension 3, one cross product per triangle
+def triangle_cross_products(coords):
+    data = array('d')
+    it = iter(coords)
+    for ax, ay, az, bx, by, bz, cx, cy, cz in zip(it, it, it, it, it, it, it, it, it):
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        vx, vy, vz = cx - ax, cy - ay, cz - az
+        data.extend((uy * vz - vy * uz, vx * uz - ux * vz, ux * vy - vx * uy))
+    return VectorBatch(data, 3)
+
+
+# -----------------------------------------------------------------------------
+# triangle_areas(coords):
+#   Area of each triangle: half the magnitude of the cross product of two edges.
+#   The cross products are not materialized.
+#
+# Arguments:
+#   coords: array('d') holding 9 values per triangle
+#
+# Returns:
+#   array('d'), one area per triangle
+def triangle_areas(coords):
+    hypot = math.hypot
+    areas = array('d')
+    it = iter(coords)
+    for ax, ay, az, bx, by, bz, cx, cy, cz in zip(it, it, it, it, it, it, it, it, it):
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        vx, vy, vz = cx - ax, cy - ay, cz - az
+        areas.append(0.5 * hypot(uy * vz - vy * uz, vx * uz - ux * vz, ux * vy - vx * uy))
+    return areas
+
+
+# -----------------------------------------------------------------------------
+# stream_stl(path, chunk_size):
+#   Read the triangles of a binary STL file in chunks, so that meshes larger than
+#   memory can be processed. The stored facet normals are ignored.
+#
+# Arguments:
+#   path: path of a binary STL file
+#   chunk_size: number of triangles per chunk
+#
+# Returns:
+#   a generator of array('d'), 9 values per triangle
+def stream_stl(path, chunk_size=65536):
+    with open(path, 'rb') as f:
+        f.read(STL_HEADER_SIZE)
+        count, = struct.unpack('<I', f.read(4))
+
+        while count > 0:
+            n = min(chunk_size, count)
+            buf = f.read(n * STL_TRIANGLE.size)
+            if len(buf) < n * STL_TRIANGLE.size:
+                raise Exception('Unexpected end of STL file')
+
+            coords = array('d')
+            for t in STL_TRIANGLE.iter_unpack(buf):
+                coords.extend(t[3:12])
+            yield coords
+            count -= n
+
+
+# -----------------------------------------------------------------------------
+# stream_obj(path, chunk_size):
+#   Read the triangles of a Wavefront OBJ file in chunks. Vertices ('v' lines) are
+#   kept in memory since faces may refer to any of them; faces ('f' lines) are
+#   streamed. Polygons are split into triangle fans and negative (relative) indices
+#   are supported; an index to a vertex not defined yet raises an exception, as
+#   does a vertex with fewer than 3 coordinates.
+#
+# Arguments:
+#   path: path of an OBJ file
+#   chunk_size: number of triangles per chunk
+#
+# Returns:
+#   a generator of array('d'), 9 values per triangle
+def stream_obj(path, chunk_size=65536):
+    vertices = array('d')
+    coords = array('d')
+
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+
+            if fields[0] == 'v':
+                if len(fields) < 4:
+                    raise Exception(Mesh.VERTICES_MUST_BE_3D_MSG)
+                vertices.extend(float(x) for x in fields[1:4])
+
+            elif fields[0] == 'f':
+                num_vertices = len(vertices) // 3
+                corners = []
+                for field in fields[1:]:
+                    i = int(field.split('/')[0])
+                    i = i - 1 if i > 0 else num_vertices + i
+                    if not 0 <= i < num_vertices:
+                        raise Exception(Mesh.INVALID_FACE_INDEX_MSG)
+                    corners.append(i)
+
+                for k in range(1, len(corners) - 1):
+                    for i in (corners[0], corners[k], corners[k + 1]):
+                        coords.extend(vertices[3 * i:3 * i + 3])
+
+                if len(coords) >= 9 * chunk_size:
+                    yield coords
+                    coords = array('d')
+
+    if coords:
+        yield coords
+
+
+# -----------------------------------------------------------------------------
+# surface_area(chunks):
+#   Total area of the triangles produced by stream_stl() / stream_obj() (or any
+#   iterable of packed triangle coordinates).
+#
+# Returns:
+#   the total area as a float
+def surface_area(chunks):
+    return math.fsum(math.fsum(triangle_areas(c)) for c in chunks)
+
+
+def write_stl(path, coords):
+    with open(path, 'wb') as f:
+        f.write(b'\0' * STL_HEADER_SIZE)
+        f.write(struct.pack('<I', len(coords) // 9))
+        it = iter(coords)
+        for triangle in zip(it, it, it, it, it, it, it, it, it):
+            f.write(STL_TRIANGLE.pack(0.0, 0.0, 0.0, *triangle, 0))
+
+
+def test():
+    import os
+    import tempfile
+
+    # unit cube: 8 vertices, 12 triangles, surface area 6
+    vertices = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]]
+    faces = [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7),
+             (0, 1, 5), (0, 5, 4), (1, 2, 6), (1, 6, 5),
+             (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7)]
+    cube = Mesh(vertices, faces)
+
+    print('faces:', len(cube))
+    print('face areas:', list(cube.face_areas()))
+    print('surface area:', cube.surface_area())
+    print('first cross product:', cube.cross_products()[0])
+
+    path = os.path.join(tempfile.mkdtemp(), 'cube.stl')
+    write_stl(path, cube.triangle_coordinates())
+    print('surface area from STL in chunks of 5:', surface_area(stream_stl(path, chunk_size=5)))
+    os.remove(path)
+
+    path = os.path.join(tempfile.mkdtemp(), 'quad.obj')
+    for face in ('f 1 2 3 4', 'f -4 -3 -2 -1', 'f 1 2 5', 'f 1 2 -5'):
+        with open(path, 'w') as f:
+            f.write('v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n' + face + '\n')
+        try:
+            print('{}: surface area {}'.format(face, surface_area(stream_obj(path))))
+        except Exception as e:
+            print('{}: {}'.format(face, e))
+    os.remove(path)
+
+    try:
+        Mesh([[0, 0], [1, 0], [0, 1]], [(0, 1, 2)])
+    except Exception as e:
+        print(e)
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,189 @@
+import math
+from contextlib import contextmanager
+from decimal import Decimal, DefaultContext, getcontext, localcontext
+from fractions import Fraction
+
+# Decimal contexts are per thread: getcontext() only configures the thread that
+# imports this module, while every other thread starts from a copy of
+# DefaultContext. Setting both makes worker threads compute at 30 digits too.
+PRECISION = 30
+DefaultContext.prec = PRECISION
+getcontext().prec = PRECISION
+
+
+# -----------------------------------------------------------------------------
+# Numeric backends:
+#   A backend decides how the coordinates of a Vector (and every object built on
+#   top of it: Line, Plane, LinearSystem, Matrix) are stored and computed with.
+#      - DECIMAL: software Decimal arithmetic at 30 digits of precision (default)
+#      - FLOAT64: hardware doubles, much faster but limited to ~16 digits
+#      - FRACTION: exact rational arithmetic; zero tests are exact so elimination
+#           needs no epsilon, only square roots (magnitudes) are approximated.
+#           Fraction operations run in pure Python and cost more than Decimal
+#           ones: LinearSystem.solve_system() is 2-4x slower than with DECIMAL.
+#           elimination.AugmentedMatrix eliminates on integer rows instead and
+#           is about as fast as DECIMAL on small-integer systems; the gain of
+#           this backend is exactness, not speed
+#
+#   Objects derived from a Vector always inherit the backend of that Vector, so
+#   a whole workload can be switched by choosing the backend of its inputs.
+class DecimalBackend(object):
+
+    name = 'decimal'
+
+    def __init__(self):
+        self.zero = Decimal(0)
+        self.one = Decimal(1)
+
+    def convert(self, x):
+        try:
+            return Decimal(x)
+
+        except TypeError:               # Decimal() does not accept a Fraction
+            return Decimal(x.numerator) / Decimal(x.denominator)
+
+    def coords(self, iterable):
+        try:
+            return tuple(Decimal(x) for x in iterable)
+
+        except TypeError:               # Fraction coordinates, e.g. from to_backend()
+            return tuple(self.convert(x) for x in iterable)
+
+    def sqrt(self, x):
+        return x.sqrt()
+
+    def is_near_zero(self, x, eps=1e-10):
+        return abs(x) < eps
+
+    def __repr__(self):
+        return 'DecimalBackend()'
+
+    def __reduce__(self):       # copies and unpickled objects share the module-level backend instance
+        return get_backend, (self.name,)
+
+
+class Float64Backend(object):
+
+    name = 'float64'
+
+    def __init__(self):
+        self.zero = 0.0
+        self.one = 1.0
+
+    def convert(self, x):
+        return float(x)
+
+    def coords(self, iterable):
+        return tuple(float(x) for x in iterable)
+
+    def sqrt(self, x):
+        return math.sqrt(x)
+
+    def is_near_zero(self, x, eps=1e-10):
+        return abs(x) < eps
+
+    def __repr__(self):
+        return 'Float64Backend()'
+
+    def __reduce__(self):       # copies and unpickled objects share the module-level backend instance
+        return get_backend, (self.name,)
+
+
+class FractionBackend(object):
+
+    name = 'fraction'
+
+    def __init__(self):
+        self.zero = Fraction(0)
+        self.one = Fraction(1)
+
+    def convert(self, x):
+        if isinstance(x, float):            # use the shortest decimal repr of a float, not its binary expansion,
+            return Fraction(repr(x))        # so that 0.1 becomes 1/10
+        return Fraction(x)
+
+    def coords(self, iterable):
+        return tuple(self.convert(x) for x in iterable)
+
+    def sqrt(self, x):
+        num_root = math.isqrt(x.numerator) if x >= 0 else -1
+        den_root = math.isqrt(x.denominator)
+        if num_root * num_root == x.numerator and den_root * den_root == x.denominator:
+            return Fraction(num_root, den_root)                 # perfect squares keep an exact root
+        return Fraction((Decimal(x.numerator) / Decimal(x.denominator)).sqrt())
+
+    def is_near_zero(self, x, eps=None):    # exact arithmetic: only an actual zero is zero
+        return x == 0
+
+    def __repr__(self):
+        return 'FractionBackend()'
+
+    def __reduce__(self):       # copies and unpickled objects share the module-level backend instance
+        return get_backend, (self.name,)
+
+
+DECIMAL = DecimalBackend()
+FLOAT64 = Float64Backend()
+FRACTION = FractionBackend()
+
+BACKENDS = {DECIMAL.name: DECIMAL, FLOAT64.name: FLOAT64, FRACTION.name: FRACTION}
+UNKNOWN_BACKEND_MSG = 'Unknown numeric backend'
+
+
+# -----------------------------------------------------------------------------
+# get_backend(backend):
+#   Resolve a backend given either its name or the backend object itself.
+#
+# Arguments:
+#   backend: None (the default backend), a backend name ('decimal', 'float64',
+#       'fraction') or a backend object
+#
+# Returns:
+#   a backend object
+def get_backend(backend=None):
+    if backend is None:
+        return DECIMAL
+
+    if isinstance(backend, str):
+        try:
+            return BACKENDS[backend]
+
+        except KeyError:
+            raise Exception(UNKNOWN_BACKEND_MSG)
+
+    return backend
+
+
+# -----------------------------------------------------------------------------
+# precision(prec):
+#   Context manager running the enclosed Decimal computations at 'prec' digits in
+#   the current thread only, restoring the previous precision on exit. Other
+#   threads are not affected, so concurrent callers may each use their own
+#   precision (lower precision trades accuracy for speed).
+#
+# Arguments:
+#   prec: number of significant digits, or None to keep the current precision
+#
+# Example:
+#   with precision(16):
+#       solution = system.solve_system()
+@contextmanager
+def precision(prec=None):
+    with localcontext() as ctx:
+        if prec is not None:
+            ctx.prec = prec
+        yield ctx
+
+
+# -----------------------------------------------------------------------------
+# backend_of(obj):
+#   Determine the backend used by an object, falling back to the default backend
+#   for plain iterables (lists, tuples) which carry no backend of their own.
+#
+# Arguments:
+#   obj: a Vector or any iterable of numbers
+#
+# Returns:
+#   a backend object
+def backend_of(obj):
+    return getattr(obj, 'backend', DECIMAL)
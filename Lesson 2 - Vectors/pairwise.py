@@ -0,0 +1,126 @@
+import math
+from array import array
+from operator import mul
+
+from vector_batch import VectorBatch
+
+
+class PairwiseTile(object):
+
+    # -----------------------------------------------------------------------------
+    # PairwiseTile:
+    #   One block of the pairwise report covering rows [row_start, row_stop) and
+    #   columns [col_start, col_stop) of the N x N Gram matrix.
+    #
+    # Attributes:
+    #   gram: list of array('d'), gram[r][c] = v_(row_start+r) • v_(col_start+c)
+    #   angles: list of array('d') of angles in radians (nan when a vector is zero)
+    #   parallel_pairs, orthogonal_pairs: lists of (i, j) with i < j found in the tile
+    def __init__(self, row_start, row_stop, col_start, col_stop):
+        self.row_start = row_start
+        self.row_stop = row_stop
+        self.col_start = col_start
+        self.col_stop = col_stop
+        self.gram = []
+        self.angles = []
+        self.parallel_pairs = []
+        self.orthogonal_pairs = []
+
+    def __str__(self):
+        return 'PairwiseTile: rows {}-{}, columns {}-{}, {} parallel, {} orthogonal pairs'.format(
+            self.row_start, self.row_stop - 1, self.col_start, self.col_stop - 1,
+            len(self.parallel_pairs), len(self.orthogonal_pairs))
+
+
+# -----------------------------------------------------------------------------
+# pairwise_report(vectors, tile_size, epsilon):
+#   Compare every pair of vectors through the Gram matrix G = V Vᵀ. The magnitudes
+#   sqrt(G_ii) are computed once up front, so no vector is ever normalized:
+#      - cos θ_ij = G_ij / sqrt(G_ii G_jj)
+#      - i, j parallel   <=>  either vector is zero or | |cos θ_ij| - 1 | < epsilon
+#      - i, j orthogonal <=>  |G_ij| < epsilon
+#   which match Vector.is_parallel() and Vector.is_orthogonal(). Only the tiles on
+#   or above the diagonal are produced (G is symmetric) and one tile is held in
+#   memory at a time, so memory stays bounded by tile_size² for any N. The rows
+#   of a tile are sliced from the flat buffer of the batch when the tile is
+#   computed; the N vectors are never copied out as a whole.
+#
+# Arguments:
+#   vectors: a VectorBatch or a list of Vector objects of the same dimension
+#   tile_size: number of rows and columns in a tile
+#   epsilon: tolerance shared with Vector.is_parallel() / is_orthogonal()
+#
+# Returns:
+#   a generator of PairwiseTile objects
+def pairwise_report(vectors, tile_size=256, epsilon=1e-10):
+    batch = vectors if isinstance(vectors, VectorBatch) else VectorBatch.from_vectors(vectors)
+    data = batch.data
+    d = batch.dimension
+    mags = batch.get_mag()
+    n = batch.size
+
+    for row_start in range(0, n, tile_size):
+        row_stop = min(row_start + tile_size, n)
+
+        for col_start in range(row_start, n, tile_size):
+            col_stop = min(col_start + tile_size, n)
+            tile = PairwiseTile(row_start, row_stop, col_start, col_stop)
+            columns = [data[j*d:(j+1)*d] for j in range(col_start, col_stop)]
+
+            for i in range(row_start, row_stop):
+                v = data[i*d:(i+1)*d]
+                gram_row = array('d', [sum(map(mul, v, w)) for w in columns])
+                angle_row = array('d')
+
+                for j, g in zip(range(col_start, col_stop), gram_row):
+                    m = mags[i] * mags[j]
+                    is_zero = mags[i] < epsilon or mags[j] < epsilon
+                    cosine = g / m if not is_zero else math.nan
+                    angle_row.append(math.acos(max(-1.0, min(1.0, cosine))) if not is_zero else math.nan)
+
+                    if j <= i:
+                        continue
+                    if is_zero or abs(abs(cosine) - 1) < epsilon:
+                        tile.parallel_pairs.append((i, j))
+                    if abs(g) < epsilon:
+                        tile.orthogonal_pairs.append((i, j))
+
+                tile.gram.append(gram_row)
+                tile.angles.append(angle_row)
+
+            yield tile
+
+
+# -----------------------------------------------------------------------------
+# parallel_and_orthogonal_pairs(vectors, tile_size, epsilon):
+#   Collect only the pair lists of pairwise_report(), discarding the tiles.
+#
+# Returns:
+#   (parallel_pairs, orthogonal_pairs), two sorted lists of (i, j) with i < j
+def parallel_and_orthogonal_pairs(vectors, tile_size=256, epsilon=1e-10):
+    parallel, orthogonal = [], []
+    for tile in pairwise_report(vectors, tile_size, epsilon):
+        parallel.extend(tile.parallel_pairs)
+        orthogonal.extend(tile.orthogonal_pairs)
+    return sorted(parallel), sorted(orthogonal)
+
+
+def test():
+    from vector import Vector
+
+    vectors = [Vector([-7.579, -7.88]), Vector([22.737, 23.64]),
+               Vector([-2.328, -7.284]), Vector([-7.284, 2.328]), Vector([0, 0])]
+
+    for tile in pairwise_report(vectors, tile_size=2):
+        print(tile)
+
+    parallel, orthogonal = parallel_and_orthogonal_pairs(vectors, tile_size=2)
+    print('parallel pairs:', parallel)
+    print('orthogonal pairs:', orthogonal)
+    print('matches Vector methods:',
+          parallel == [(i, j) for i in range(5) for j in range(i + 1, 5) if vectors[i].is_parallel(vectors[j])] and
+          orthogonal == [(i, j) for i in range(5) for j in range(i + 1, 5) if vectors[i].is_orthogonal(vectors[j])])
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,293 @@
+import csv
+import json
+import math
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from vector import Vector
+from vector_batch import VectorBatch
+from numeric import FLOAT64
+
+
+# -----------------------------------------------------------------------------
+# Sources:
+#   Generators reading vectors lazily from a file and yielding them as VectorBatch
+#   chunks of at most chunk_size vectors, so only one chunk is in memory at once.
+def read_csv(path, chunk_size=10000, columns=None, skip_header=False):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        if skip_header:
+            next(reader, None)
+        rows = (r if columns is None else [r[c] for c in columns] for r in reader if r)
+        for chunk in _chunked(rows, chunk_size):
+            yield chunk
+
+
+def read_jsonl(path, chunk_size=10000, key=None):
+    with open(path) as f:
+        rows = (json.loads(line) for line in f if line.strip())
+        if key is not None:
+            rows = (r[key] for r in rows)
+        for chunk in _chunked(rows, chunk_size):
+            yield chunk
+
+
+def from_vectors(vectors, chunk_size=10000):
+    for chunk in _chunked((v.coordinates if isinstance(v, Vector) else v for v in vectors), chunk_size):
+        yield chunk
+
+
+def _chunked(rows, chunk_size):
+    data = array('d')
+    dimension = None
+    count = 0
+
+    for r in rows:
+        if dimension is None:
+            dimension = len(r)
+        elif len(r) != dimension:
+            raise Exception(VectorBatch.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+        data.extend(float(x) for x in r)
+        count += 1
+
+        if count == chunk_size:
+            yield VectorBatch(data, dimension)
+            data, count = array('d'), 0
+
+    if count:
+        yield VectorBatch(data, dimension)
+
+
+# -----------------------------------------------------------------------------
+# Stages:
+#   Each stage maps one VectorBatch chunk to another and keeps no state between
+#   chunks, so chunks can be processed independently (and in worker processes).
+class Normalize(object):
+
+    def __call__(self, batch):
+        return batch.normalize()
+
+
+class Project(object):
+
+    # 'basis' is a Vector (projection onto its direction) or a Subspace
+    def __init__(self, basis):
+        self.basis = basis
+
+    def __call__(self, batch):
+        if isinstance(self.basis, Vector):
+            u = [float(x) for x in self.basis.normalize()]
+            coefficients = batch.dot_product(Vector(u, FLOAT64))
+            return VectorBatch(array('d', [c * x for c in coefficients for x in u]), batch.dimension)
+        return self.basis.project_batch(batch)
+
+
+class FilterZero(object):
+
+    # drops the vectors for which Vector.is_zero(epsilon) holds
+    def __init__(self, epsilon=1e-10):
+        self.epsilon = epsilon
+
+    def __call__(self, batch):
+        d = batch.dimension
+        data = array('d')
+        for i, mag in enumerate(batch.get_mag()):
+            if not mag < self.epsilon:
+                data.extend(batch.data[i * d:(i + 1) * d])
+        return VectorBatch(data, d)
+
+
+def _apply_stages(stages, batch):
+    for stage in stages:
+        batch = stage(batch)
+    return batch
+
+
+class RunningStats(object):
+
+    NO_VECTORS_MSG = 'No vectors in the stream'
+
+    # -----------------------------------------------------------------------------
+    # RunningStats:
+    #   Constant-memory summary of a stream of vectors: count, coordinate-wise sum
+    #   (hence the mean vector) and the distribution of magnitudes (min, max, mean,
+    #   standard deviation). Two summaries of disjoint streams can be merged.
+    #   Magnitudes are summarized by their mean and M2, the sum of squared
+    #   deviations from the mean, combined batch by batch with Chan's update of
+    #   Welford's method, which avoids the cancellation of E[x²] - E[x]².
+    #   mean(), mean_mag() and std_mag() raise NO_VECTORS_MSG on an empty stream.
+    def __init__(self):
+        self.count = 0
+        self.dimension = None
+        self.sum = None
+        self.mag_mean = 0.0
+        self.mag_m2 = 0.0
+        self.min_mag = math.inf
+        self.max_mag = -math.inf
+
+    def update(self, batch):
+        if batch.size == 0:
+            return self
+
+        d = batch.dimension
+        self._test_dimension(d)
+        self.sum = [a + math.fsum(batch.data[j::d]) for j, a in enumerate(self.sum)]
+
+        mags = batch.get_mag()
+        mean = math.fsum(mags) / batch.size
+        m2 = math.fsum((m - mean) ** 2 for m in mags)
+        self._combine(batch.size, mean, m2)
+        self.min_mag = min(self.min_mag, min(mags))
+        self.max_mag = max(self.max_mag, max(mags))
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        self._test_dimension(other.dimension)
+        self.sum = [a + b for a, b in zip(self.sum, other.sum)]
+        self._combine(other.count, other.mag_mean, other.mag_m2)
+        self.min_mag = min(self.min_mag, other.min_mag)
+        self.max_mag = max(self.max_mag, other.max_mag)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mag_mean
+        self.mag_mean += delta * count / total
+        self.mag_m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _test_dimension(self, dimension):
+        if self.dimension is None:
+            self.dimension = dimension
+            self.sum = [0.0] * dimension
+        elif dimension != self.dimension:
+            raise Exception(VectorBatch.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+    def _test_nonempty(self):
+        if not self.count:
+            raise Exception(self.NO_VECTORS_MSG)
+
+    def mean(self):
+        self._test_nonempty()
+        return Vector([x / self.count for x in self.sum], FLOAT64)
+
+    def mean_mag(self):
+        self._test_nonempty()
+        return self.mag_mean
+
+    def std_mag(self):
+        self._test_nonempty()
+        return math.sqrt(self.mag_m2 / self.count)
+
+    def __str__(self):
+        if not self.count:
+            return 'RunningStats: empty'
+        return ('RunningStats: {} vectors\n  mean: {}\n  magnitude min {:.3f}, max {:.3f}, mean {:.3f}, std {:.3f}'
+                .format(self.count, self.mean(), self.min_mag, self.max_mag, self.mean_mag(), self.std_mag()))
+
+
+class Pipeline(object):
+
+    # -----------------------------------------------------------------------------
+    # Pipeline(source):
+    #   Chain stages over a lazy source of VectorBatch chunks, e.g.
+    #       Pipeline(read_csv(path)).filter_zero().normalize().project(b).stats()
+    #   Nothing is read until the pipeline is consumed (stats(), reduce() or
+    #   iterating over chunks()).
+    #
+    # Arguments:
+    #   source: iterable of VectorBatch chunks (read_csv, read_jsonl, from_vectors...)
+    def __init__(self, source, stages=None):
+        self.source = source
+        self.stages = stages or []
+
+    def then(self, stage):
+        return Pipeline(self.source, self.stages + [stage])
+
+    def normalize(self):
+        return self.then(Normalize())
+
+    def project(self, basis):
+        return self.then(Project(basis))
+
+    def filter_zero(self, epsilon=1e-10):
+        return self.then(FilterZero(epsilon))
+
+    # -----------------------------------------------------------------------------
+    # chunks(self, workers, max_pending):
+    #   Run the stages over the source.
+    #
+    # Arguments:
+    #   workers: None to run in this process, or the number of worker processes
+    #       that process chunks in parallel (stages must then be picklable)
+    #   max_pending: maximum number of chunks submitted to the workers at a time,
+    #       which keeps memory bounded however long the source is
+    #
+    # Returns:
+    #   a generator of processed VectorBatch chunks, in source order
+    def chunks(self, workers=None, max_pending=None):
+        if not workers:
+            for batch in self.source:
+                yield _apply_stages(self.stages, batch)
+            return
+
+        max_pending = max_pending or 2 * workers
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+            for batch in self.source:
+                pending.append(executor.submit(_apply_stages, self.stages, batch))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def reduce(self, reducer, workers=None):
+        for batch in self.chunks(workers):
+            reducer.update(batch)
+        return reducer
+
+    def stats(self, workers=None):
+        return self.reduce(RunningStats(), workers)
+
+
+def test():
+    import os
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), 'vectors.csv')
+    with open(path, 'w') as f:
+        f.write('x,y,z\n')
+        for i in range(1000):
+            f.write('{},{},{}\n'.format(i % 7, (i * 3) % 5, 0 if i % 10 else 1))
+
+    print(Pipeline(read_csv(path, chunk_size=128, skip_header=True)).stats())
+    print(Pipeline(read_csv(path, chunk_size=128, skip_header=True)).filter_zero().normalize().stats())
+    print(Pipeline(read_csv(path, chunk_size=128, skip_header=True))
+          .project(Vector([1, 0, 0])).filter_zero().stats(workers=2))
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+    # magnitudes 1e8 + 1 and 1e8 + 3: E[x²] - E[x]² loses the spread entirely
+    stats = RunningStats().update(VectorBatch([1e8 + 1, 0], 2)).merge(RunningStats().update(VectorBatch([1e8 + 3, 0], 2)))
+    print('std of large magnitudes:', stats.std_mag())
+
+    try:
+        stats.update(VectorBatch([1, 2, 3], 3))
+    except Exception as e:
+        print(e)
+
+    empty = RunningStats()
+    print(empty)
+    for summary in (empty.mean, empty.mean_mag, empty.std_mag):
+        try:
+            summary()
+        except Exception as e:
+            print(summary.__name__, e)
+
+
+if __name__ == '__main__':
+    test()
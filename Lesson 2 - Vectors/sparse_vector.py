@@ -0,0 +1,269 @@
+from decimal import getcontext
+
+from vector import Vector
+from numeric import get_backend
+
+
+class SparseVector(object):
+
+    CANNOT_NORMALIZE_ZERO_VECTOR_MSG = Vector.CANNOT_NORMALIZE_ZERO_VECTOR_MSG
+    NO_UNIQUE_PARALLEL_COMPONENT_MSG = Vector.NO_UNIQUE_PARALLEL_COMPONENT_MSG
+    VECTORS_MUST_BE_IN_SAME_DIM_MSG = 'Both vectors must have the same dimension'
+    INDEX_OUT_OF_RANGE_MSG = 'Index out of range for the dimension of the vector'
+
+    __slots__ = ('entries', 'dimension', 'backend', '_mag', '_unit')
+
+    # -----------------------------------------------------------------------------
+    # SparseVector(entries, dimension, backend):
+    #   A vector of which only the nonzero coordinates are stored, as a dict mapping
+    #   index -> value. Operations iterate over the stored entries only, so their
+    #   cost depends on the number of nonzeros and not on the dimension.
+    #
+    # Arguments:
+    #   entries: dict {index: value} or iterable of (index, value) pairs
+    #   dimension: the dimension of the vector
+    #   backend: numeric backend of the values (see numeric.py)
+    def __init__(self, entries, dimension, backend=None):
+        if dimension < 1:
+            raise ValueError('The dimension must be a positive integer')
+
+        self.backend = get_backend(backend)
+        self.dimension = dimension
+        self.entries = {}
+
+        items = entries.items() if isinstance(entries, dict) else entries
+        for i, x in items:
+            if not 0 <= i < dimension:
+                raise Exception(self.INDEX_OUT_OF_RANGE_MSG)
+            x = self.backend.convert(x)
+            if x != 0:
+                self.entries[i] = x
+
+    @classmethod
+    def _from_entries(cls, entries, dimension, backend):
+        v = object.__new__(cls)
+        v.entries = entries
+        v.dimension = dimension
+        v.backend = backend
+        return v
+
+    @classmethod
+    def from_dense(cls, v):
+        return cls._from_entries({i: x for i, x in enumerate(v.coordinates) if x != 0}, v.dimension, v.backend)
+
+    def to_dense(self):
+        coordinates = [self.backend.zero] * self.dimension
+        for i, x in self.entries.items():
+            coordinates[i] = x
+        return Vector._from_coords(tuple(coordinates), self.backend)
+
+    def to_backend(self, backend):
+        backend = get_backend(backend)
+        if backend is self.backend:
+            return self
+        return SparseVector(self.entries, self.dimension, backend)
+
+    def nnz(self):
+        return len(self.entries)
+
+    # -----------------------------------------------------------------------------
+    # dot_product(self, other):
+    #   Dot product with a SparseVector (iterating over the one with fewer entries)
+    #   or with a dense Vector (iterating over the entries of 'self').
+    def dot_product(self, other):
+        self._test_same_dimension(other)
+
+        if isinstance(other, SparseVector):
+            other = other.to_backend(self.backend)
+            a, b = self.entries, other.entries
+            if len(a) > len(b):
+                a, b = b, a
+            y = self.backend.zero
+            for i, x in a.items():
+                w = b.get(i)
+                if w is not None:
+                    y += x * w
+            return y
+
+        coordinates = other.to_backend(self.backend).coordinates
+        y = self.backend.zero
+        for i, x in self.entries.items():
+            y += x * coordinates[i]
+        return y
+
+    # get_mag() and normalize() cache their result with the Decimal precision it
+    # was computed at, and recompute it under another precision (see
+    # numeric.precision())
+    def get_mag(self):
+        prec = getcontext().prec
+        try:
+            mag_prec, mag = self._mag
+            if mag_prec == prec:
+                return mag
+
+        except AttributeError:
+            pass
+
+        x = self.backend.zero
+        for e in self.entries.values():
+            x += e * e
+        mag = self.backend.sqrt(x)
+        self._mag = (prec, mag)
+        return mag
+
+    def normalize(self):
+        prec = getcontext().prec
+        try:
+            unit_prec, unit = self._unit
+            if unit_prec == prec:
+                return unit
+
+        except AttributeError:
+            pass
+
+        try:
+            unit = self.scalar_mult(self.backend.one / self.get_mag())
+
+        except ZeroDivisionError:
+            raise Exception(self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG)
+
+        self._unit = (prec, unit)
+        return unit
+
+    def scalar_mult(self, c):
+        c = self.backend.convert(c)
+        if c == 0:
+            return SparseVector._from_entries({}, self.dimension, self.backend)
+        return SparseVector._from_entries({i: c * x for i, x in self.entries.items()}, self.dimension, self.backend)
+
+    # -----------------------------------------------------------------------------
+    # projection_to(self, basis), orthogonal_to(self, basis):
+    #   Same as Vector.projection_to() / Vector.orthogonal_to() with sparse
+    #   arithmetic. The result is sparse when 'basis' is sparse.
+    def projection_to(self, basis):
+        try:
+            unit_b = basis.normalize()
+            return unit_b.scalar_mult(self.dot_product(unit_b))
+
+        except Exception as e:
+            if str(e) == self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG:
+                raise Exception(self.NO_UNIQUE_PARALLEL_COMPONENT_MSG)
+            else:
+                raise e
+
+    def orthogonal_to(self, basis):
+        return self - self.projection_to(basis)
+
+    def is_orthogonal(self, other, epsilon=1e-10):
+        return abs(self.dot_product(other)) < epsilon
+
+    def is_zero(self, epsilon=1e-10):
+        return self.get_mag() < epsilon
+
+    # -----------------------------------------------------------------------------
+    # __add__, __sub__:
+    #   Sparse +/- sparse gives a SparseVector, touching the entries of both only.
+    #   Adding a dense Vector gives a dense Vector.
+    def __add__(self, other):
+        return self._combine(other, 1)
+
+    def __sub__(self, other):
+        return self._combine(other, -1)
+
+    def __radd__(self, other):
+        return self._combine(other, 1)
+
+    def __rsub__(self, other):
+        return self.scalar_mult(-1)._combine(other, 1)
+
+    def _combine(self, other, sign):
+        self._test_same_dimension(other)
+
+        if isinstance(other, SparseVector):
+            other = other.to_backend(self.backend)
+            entries = dict(self.entries)
+            zero = self.backend.zero
+            for i, x in other.entries.items():
+                y = entries.get(i, zero) + sign * x
+                if y == 0:
+                    entries.pop(i, None)
+                else:
+                    entries[i] = y
+            return SparseVector._from_entries(entries, self.dimension, self.backend)
+
+        coordinates = list(other.to_backend(self.backend).coordinates)
+        if sign < 0:
+            coordinates = [-x for x in coordinates]
+        for i, x in self.entries.items():
+            coordinates[i] += x
+        return Vector._from_coords(tuple(coordinates), self.backend)
+
+    def _test_same_dimension(self, other):
+        if self.dimension != other.dimension:
+            raise Exception(self.VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+    def __eq__(self, other):
+        if isinstance(other, SparseVector):
+            return self.dimension == other.dimension and self.entries == other.entries
+        return self.to_dense() == other
+
+    def __hash__(self):
+        return hash(self.to_dense())
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.dimension
+        if not 0 <= i < self.dimension:
+            raise IndexError(self.INDEX_OUT_OF_RANGE_MSG)
+        return self.entries.get(i, self.backend.zero)
+
+    def __iter__(self):
+        return iter(self.to_dense().coordinates)
+
+    def __str__(self):
+        num_decimal_places = 3
+        entries = ', '.join('{}: {}'.format(i, round(float(self.entries[i]), num_decimal_places))
+                            for i in sorted(self.entries))
+        return 'SparseVector: dim {}, {{{}}}'.format(self.dimension, entries)
+
+
+def test():
+    v = SparseVector({0: 3, 9999: 4}, 10000)
+    w = SparseVector({9999: 2, 5: 1}, 10000)
+
+    print(v)
+    print('magnitude:', v.get_mag())
+    print('dot product:', v.dot_product(w))
+    print('sum:', v + w)
+    print('difference:', v - v)
+    print('projection of v on w:', v.projection_to(w))
+    print('orthogonal:', v.orthogonal_to(w).is_orthogonal(w))
+
+    dense = Vector([1, 2, 0, 0, 3])
+    s = SparseVector.from_dense(Vector([0, 1, 0, 0, 1]))
+    print('dot with dense:', s.dot_product(dense), dense.dot_product(s))
+    print('dense + sparse:', s + dense)
+    print('round trip:', SparseVector.from_dense(s.to_dense()) == s)
+
+    try:
+        s.projection_to(SparseVector({}, 5))
+    except Exception as e:
+        print(e)
+
+    # cost scales with the nonzeros: the dimension does not matter
+    import timeit
+    for dim in (100, 1000000):
+        a = SparseVector({1: 1, 7: 2, 50: 3}, dim)
+        b = SparseVector({7: 5, 50: 1, 99: 2}, dim)
+        print('dim {}: {:.2f} us per dot product'.format(dim, timeit.timeit(lambda: a.dot_product(b), number=10000) * 100))
+
+    # mixed dense / sparse operations iterate over the nonzeros of the sparse operand too
+    for dim in (1000, 100000):
+        dense = Vector([1] * dim)
+        a = SparseVector({1: 1, 7: 2, 50: 3}, dim)
+        print('dim {}: {:.2f} us per dense.dot_product(sparse)'.format(
+            dim, timeit.timeit(lambda: dense.dot_product(a), number=1000) * 1000))
+
+
+if __name__ == '__main__':
+    test()
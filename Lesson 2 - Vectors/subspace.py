@@ -0,0 +1,136 @@
+from array import array
+from operator import mul
+
+from vector import Vector
+from vector_batch import VectorBatch
+
+
+class Subspace(object):
+
+    ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG = 'All vectors should live in the same dimension'
+
+    # -----------------------------------------------------------------------------
+    # Subspace(vectors, reorthogonalize, epsilon):
+    #   Build an orthonormal basis of the subspace spanned by 'vectors' with the
+    #   modified Gram-Schmidt procedure: each vector has its components along the
+    #   basis vectors found so far removed one at a time (Vector.orthogonal_to) and
+    #   what remains is normalized into the next basis vector. Vectors whose
+    #   remainder is negligible compared to their own magnitude are linearly
+    #   dependent on the previous ones and are skipped.
+    #
+    #   The basis is computed once, so projecting any number of vectors afterwards
+    #   costs dot products only.
+    #
+    # Arguments:
+    #   vectors: nonempty list of Vector objects of the same dimension
+    #   reorthogonalize: run a second Gram-Schmidt pass on each vector, which
+    #       restores orthogonality lost to rounding for ill-conditioned inputs
+    #   epsilon: relative tolerance under which a remainder counts as zero
+    def __init__(self, vectors, reorthogonalize=False, epsilon=1e-10):
+        self.dimension = vectors[0].dimension
+        self.backend = vectors[0].backend
+        self.basis = []
+
+        for v in vectors:
+            if v.dimension != self.dimension:
+                raise Exception(self.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+            v = w = v.to_backend(self.backend)
+            for _ in range(2 if reorthogonalize else 1):
+                for q in self.basis:
+                    w = w.orthogonal_to(q)
+
+            if w.get_mag() > self.backend.convert(epsilon) * v.get_mag():
+                self.basis.append(w.normalize())
+
+        self.rank = len(self.basis)
+        self._float_basis = [[float(x) for x in q] for q in self.basis]
+
+    # -----------------------------------------------------------------------------
+    # projection_to(self, v):
+    #   The component of 'v' that lies in the subspace: Σ q (v • q) over the basis.
+    #
+    # Arguments:
+    #   self: a Subspace object
+    #   v: a Vector object
+    #
+    # Returns:
+    #   a Vector object
+    def projection_to(self, v):
+        v = v.to_backend(self.backend)
+        result = Vector([0] * self.dimension, self.backend)
+        for q in self.basis:
+            result = result + q.scalar_mult(v.dot_product(q))
+        return result
+
+    # -----------------------------------------------------------------------------
+    # orthogonal_to(self, v):
+    #   The component of 'v' orthogonal to the subspace: v - projection_to(v).
+    def orthogonal_to(self, v):
+        return v.to_backend(self.backend) - self.projection_to(v)
+
+    # -----------------------------------------------------------------------------
+    # project_batch(self, vectors), reject_batch(self, vectors):
+    #   Bulk versions of projection_to() / orthogonal_to().
+    #
+    # Arguments:
+    #   vectors: a VectorBatch, or a list of Vector objects
+    #
+    # Returns:
+    #   a VectorBatch (float64) for a VectorBatch input, otherwise a list of Vectors
+    def project_batch(self, vectors):
+        if isinstance(vectors, VectorBatch):
+            return self._batch(vectors, reject=False)
+        return [self.projection_to(v) for v in vectors]
+
+    def reject_batch(self, vectors):
+        if isinstance(vectors, VectorBatch):
+            return self._batch(vectors, reject=True)
+        return [self.orthogonal_to(v) for v in vectors]
+
+    def _batch(self, batch, reject):
+        if batch.dimension != self.dimension:
+            raise Exception(self.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+        data = array('d')
+        for v in batch.rows():
+            p = [0.0] * self.dimension
+            for q in self._float_basis:
+                c = sum(map(mul, v, q))
+                p = [a + c * b for a, b in zip(p, q)]
+            data.extend([a - b for a, b in zip(v, p)] if reject else p)
+
+        return VectorBatch(data, self.dimension)
+
+    def contains(self, v, epsilon=1e-10):
+        return self.orthogonal_to(v).is_zero(epsilon)
+
+    def __len__(self):
+        return self.rank
+
+    def __str__(self):
+        return 'Subspace of rank {} in dimension {}:\n'.format(self.rank, self.dimension) + \
+               '\n'.join(str(q) for q in self.basis)
+
+
+def test():
+    s = Subspace([Vector([3.039, 1.879, 0]), Vector([0.825, 2.036, 0]), Vector([1, 1, 0])],
+                 reorthogonalize=True)
+    print(s)
+
+    v = Vector([-9.88, -3.264, -8.159])
+    print('projection:', round(s.projection_to(v), 3))
+    print('orthogonal component:', round(s.orthogonal_to(v), 3))
+
+    batch = VectorBatch.from_vectors([v, Vector([1, 2, 3])])
+    print('batch projection:', [str(round(p, 3)) for p in s.project_batch(batch).to_vectors()])
+    print('batch rejection:', [str(round(p, 3)) for p in s.reject_batch(batch).to_vectors()])
+
+    b = Vector([0.825, 2.036])
+    line = Subspace([b])
+    print('matches Vector.projection_to:',
+          round(line.projection_to(Vector([3.039, 1.879])), 3) == round(Vector([3.039, 1.879]).projection_to(b), 3))
+
+
+if __name__ == '__main__':
+    test()
@@ -1,5 +1,8 @@
 import math
-from decimal import Decimal, getcontext
+from decimal import getcontext
+from operator import add, sub
+
+from numeric import get_backend
 
 getcontext().prec = 30
 
@@ -9,12 +12,18 @@ class Vector(object):
     CANNOT_NORMALIZE_ZERO_VECTOR_MSG = 'Cannot normalize the zero vector'
     NO_UNIQUE_PARALLEL_COMPONENT_MSG = 'No unique parallel component found'
 
-    def __init__(self, coordinates):
+    # Vectors are immutable in practice: the coordinates are a tuple and no method
+    # modifies a Vector in place, which allows the magnitude and the unit vector
+    # to be computed once per Decimal precision and cached in '_mag' and '_unit'
+    __slots__ = ('coordinates', 'dimension', 'backend', '_mag', '_unit')
+
+    def __init__(self, coordinates, backend=None):
         try:
             if not coordinates:
                 raise ValueError
 
-            self.coordinates = tuple(Decimal(x) for x in coordinates)
+            self.backend = get_backend(backend)
+            self.coordinates = self.backend.coords(coordinates)
             self.dimension = len(coordinates)
 
         except ValueError:
@@ -23,6 +32,26 @@ class Vector(object):
         except TypeError:
             raise TypeError('The coordinates must be an iterable')
 
+    # -----------------------------------------------------------------------------
+    # _from_coords(coordinates, backend):
+    #   Trusted constructor for results computed inside this class. The coordinates
+    #   are used as is, skipping the validation and per-element conversion done by
+    #   __init__.
+    #
+    # Arguments:
+    #   coordinates: nonempty tuple of numbers already of the type used by 'backend'
+    #   backend: the numeric backend of the new vector
+    #
+    # Returns:
+    #   a Vector object
+    @classmethod
+    def _from_coords(cls, coordinates, backend):
+        v = object.__new__(cls)
+        v.coordinates = coordinates
+        v.dimension = len(coordinates)
+        v.backend = backend
+        return v
+
     # -----------------------------------------------------------------------------
     # projection_to(self, basis):
     #   Determine the parallel component of the vector passed into 'self' with the
@@ -131,17 +160,17 @@ class Vector(object):
 
         x_prod = [0, 0, 0]
         v = list(self.coordinates)
-        w = list(other.coordinates)
+        w = list(other.to_backend(self.backend))
 
         if self.dimension == 2:
-            v.append(Decimal(0.0))
-            w.append(Decimal(0.0))
+            v.append(self.backend.zero)
+            w.append(self.backend.zero)
 
         x_prod[0] = v[1] * w[2] - w[1] * v[2]
         x_prod[1] = w[0] * v[2] - v[0] * w[2]
         x_prod[2] = v[0] * w[1] - w[0] * v[1]
 
-        return Vector(x_prod)
+        return Vector._from_coords(tuple(x_prod), self.backend)
 
     # -----------------------------------------------------------------------------
     # area_parallelogram(self, other):
@@ -151,7 +180,7 @@ class Vector(object):
     #   self, other: Vector objects
     #
     # Returns:
-    #   An object of the Decimal class which represents the area of a parallelogram
+    #   A number (Decimal by default) which represents the area of a parallelogram
     def area_parallelogram(self, other):
         x_prod = self.cross_prod(other)
         return x_prod.get_mag()
@@ -164,12 +193,15 @@ class Vector(object):
     #   self, other: Vector objects
     #
     # Returns:
-    #   An object of the Decimal class which represents the area of a triangle
+    #   A number (Decimal by default) which represents the area of a triangle
     def area_triangle(self, other):
-        return self.area_parallelogram(other) / Decimal(2.0)
+        return self.area_parallelogram(other) / self.backend.convert(2)
 
     def dot_product(self, other):
-        y = 0
+        if not isinstance(other, Vector):               # a SparseVector: iterate over its nonzeros only
+            return other.to_backend(self.backend).dot_product(self)
+        other = other.to_backend(self.backend)
+        y = self.backend.zero
         for i in range(self.dimension):
             y += self.coordinates[i] * other.coordinates[i]
         return y
@@ -185,58 +217,102 @@ class Vector(object):
             else:
                 raise e
 
-        return math.acos(u1.dot_product(u2))
+        return math.acos(max(-1, min(1, u1.dot_product(u2))))     # clamp rounding error outside [-1, 1]
 
     def scalar_mult(self, c):
-        x = []
-        for e in self.coordinates:
-            x.append(Decimal(c) * e)
-        return Vector(x)
+        c = self.backend.convert(c)
+        return Vector._from_coords(tuple([c * e for e in self.coordinates]), self.backend)
 
+    # get_mag() and normalize() cache their result with the Decimal precision it
+    # was computed at, and recompute it under another precision (see
+    # numeric.precision())
     def get_mag(self):
-        x = Decimal(0.0)
+        prec = getcontext().prec
+        try:
+            mag_prec, mag = self._mag
+            if mag_prec == prec:
+                return mag
+
+        except AttributeError:
+            pass
+
+        x = self.backend.zero
         for e in self.coordinates:
-            x += e ** Decimal(2.0)
-        return x ** Decimal(0.5)
+            x += e * e
+        mag = self.backend.sqrt(x)
+        self._mag = (prec, mag)
+        return mag
 
     def normalize(self):
+        prec = getcontext().prec
+        try:
+            unit_prec, unit = self._unit
+            if unit_prec == prec:
+                return unit
+
+        except AttributeError:
+            pass
+
         try:
-            return self.scalar_mult(Decimal(1.0)/self.get_mag())
+            unit = self.scalar_mult(self.backend.one / self.get_mag())
 
         except ZeroDivisionError:
             raise Exception("Cannot normalize the zero vector")
 
+        self._unit = (prec, unit)
+        return unit
+
     def __str__(self):
         num_decimal_places = 3
         coordinates = tuple(round(float(x), num_decimal_places) for x in self.coordinates)
         return 'Vector: {}'.format(coordinates)
 
     def __eq__(self, v):
+        if not isinstance(v, Vector):
+            return NotImplemented
         return self.coordinates == v.coordinates
 
+    def __hash__(self):
+        return hash(self.coordinates)
+
     def __add__(self, other):
-        result = []
-        for i in range(self.dimension):
-            result.append(self.coordinates[i] + other.coordinates[i])
-        return Vector(result)
+        if not isinstance(other, Vector):               # a SparseVector handles it in __radd__
+            return NotImplemented
+        other = other.to_backend(self.backend)
+        return Vector._from_coords(tuple(map(add, self.coordinates, other.coordinates)), self.backend)
 
     def __sub__(self, other):
-        result = []
-        for i in range(self.dimension):
-            result.append(self.coordinates[i] - other.coordinates[i])
-        return Vector(result)
+        if not isinstance(other, Vector):               # a SparseVector handles it in __rsub__
+            return NotImplemented
+        other = other.to_backend(self.backend)
+        return Vector._from_coords(tuple(map(sub, self.coordinates, other.coordinates)), self.backend)
 
     def __mul__(self, other):
-        prod = []
-        for i in range(self.dimension):
-            prod.append(self.coordinates[i] * other)
-        return Vector(prod)
+        return self.scalar_mult(other)
 
     def __round__(self, n=None):
-        rounded = []
-        for i in range(self.dimension):
-            rounded.append(round(self.coordinates[i], n))
-        return Vector(rounded)
+        if n is None:                                   # round(x) returns an int, which needs converting back
+            return Vector([round(e) for e in self.coordinates], self.backend)
+        return Vector._from_coords(tuple([round(e, n) for e in self.coordinates]), self.backend)
+
+    # -----------------------------------------------------------------------------
+    # to_backend(self, backend):
+    #   Express the vector with another numeric backend (see numeric.py). The vector
+    #   itself is returned when it already uses the requested backend.
+    #
+    # Arguments:
+    #   self: a Vector object
+    #   backend: a backend object or backend name ('decimal', 'float64', 'fraction')
+    #
+    # Returns:
+    #   a Vector object using 'backend'
+    def to_backend(self, backend):
+        if backend is self.backend:
+            return self
+        backend = get_backend(backend)
+        if backend is self.backend:
+            return self
+        return Vector(self.coordinates, backend)
 
     def __getitem__(self, i):
         return self.coordinates[i]
@@ -252,6 +328,13 @@ def test():
     print(v)
     print(round(v.cross_prod(w), 3))
 
+    # a magnitude cached under a low precision is not reused at another one
+    from numeric import precision
+    u = Vector([1, 2])
+    with precision(5):
+        print(u.get_mag(), u.normalize())
+    print(u.get_mag(), u.get_mag() == Vector([1, 2]).get_mag(), u.normalize() == Vector([1, 2]).normalize())
+
 
 if __name__ == '__main__':
     test()
@@ -0,0 +1,252 @@
+import math
+from array import array
+from operator import mul
+
+from vector import Vector
+from numeric import FLOAT64
+
+
+class VectorBatch(object):
+
+    ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG = 'All vectors in the batch should have the same dimension'
+    BATCHES_MUST_BE_THE_SAME_SIZE_MSG = 'Both batches must hold the same number of vectors'
+    CANNOT_NORMALIZE_ZERO_VECTOR_MSG = Vector.CANNOT_NORMALIZE_ZERO_VECTOR_MSG
+
+    # -----------------------------------------------------------------------------
+    # VectorBatch(data, dimension):
+    #   Store N vectors of the same dimension in one contiguous row-major buffer of
+    #   float64 values: vector i occupies data[i*dimension:(i+1)*dimension].
+    #
+    # Arguments:
+    #   data: array('d') (or any iterable of numbers) holding N*dimension values
+    #   dimension: the dimension shared by every vector in the batch
+    def __init__(self, data, dimension):
+        try:
+            if dimension < 1:
+                raise ValueError
+
+            self.data = data if isinstance(data, array) and data.typecode == 'd' else array('d', data)
+            self.dimension = dimension
+            self.size, remainder = divmod(len(self.data), dimension)
+            assert remainder == 0
+
+        except ValueError:
+            raise ValueError('The dimension must be a positive integer')
+
+        except AssertionError:
+            raise Exception(self.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+    # -----------------------------------------------------------------------------
+    # from_vectors(vectors):
+    #   Pack a list of Vector objects (or coordinate sequences) into a batch.
+    #
+    # Arguments:
+    #   vectors: nonempty iterable of Vector objects of the same dimension
+    #
+    # Returns:
+    #   a VectorBatch object
+    @classmethod
+    def from_vectors(cls, vectors):
+        data = array('d')
+        dimension = None
+
+        for v in vectors:
+            coordinates = v.coordinates if isinstance(v, Vector) else v
+            if dimension is None:
+                dimension = len(coordinates)
+            elif len(coordinates) != dimension:
+                raise Exception(cls.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+            data.extend(float(x) for x in coordinates)
+
+        if dimension is None:
+            raise ValueError('The batch must contain at least one vector')
+
+        return cls(data, dimension)
+
+    # -----------------------------------------------------------------------------
+    # to_vectors(self, backend):
+    #   Unpack the batch into a list of Vector objects.
+    #
+    # Arguments:
+    #   self: a VectorBatch object
+    #   backend: numeric backend of the returned vectors (float64 by default)
+    #
+    # Returns:
+    #   a list of Vector objects
+    def to_vectors(self, backend=FLOAT64):
+        return [Vector(row, backend) for row in self.rows()]
+
+    def rows(self):
+        d = self.dimension
+        data = self.data
+        for start in range(0, len(data), d):
+            yield data[start:start + d]
+
+    # -----------------------------------------------------------------------------
+    # dot_product(self, other):
+    #   Dot product of each vector in the batch with the matching vector of 'other'
+    #   or, when 'other' is a single Vector, with that one vector.
+    #
+    # Arguments:
+    #   self: a VectorBatch object
+    #   other: a VectorBatch object of the same size, or a Vector object
+    #
+    # Returns:
+    #   array('d') holding one dot product per vector
+    def dot_product(self, other):
+        if isinstance(other, Vector):
+            w = [float(x) for x in other.coordinates]
+            return array('d', [sum(map(mul, v, w)) for v in self.rows()])
+
+        self.test_same_size(other)
+        return array('d', [sum(map(mul, v, w)) for v, w in zip(self.rows(), other.rows())])
+
+    def get_mag(self):
+        return array('d', [math.hypot(*v) for v in self.rows()])
+
+    def normalize(self):
+        data = array('d')
+
+        for v, mag in zip(self.rows(), self.get_mag()):
+            if mag == 0.0:
+                raise Exception(self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG)
+            inv_mag = 1.0 / mag
+            data.extend([x * inv_mag for x in v])
+
+        return VectorBatch(data, self.dimension)
+
+    def get_angle(self, other):
+        try:
+            cosines = self.normalize().dot_product(self._normalized(other))
+
+        except Exception as e:
+            if str(e) == self.CANNOT_NORMALIZE_ZERO_VECTOR_MSG:
+                raise Exception("Cannot compute an angle with the zero vector")
+            else:
+                raise e
+
+        return array('d', [math.acos(max(-1.0, min(1.0, c))) for c in cosines])
+
+    # -----------------------------------------------------------------------------
+    # is_orthogonal(self, other, epsilon):
+    #   Batched Vector.is_orthogonal(): a pair is orthogonal if its dot product is
+    #   within epsilon of zero.
+    #
+    # Returns:
+    #   list of bool, one per vector
+    def is_orthogonal(self, other, epsilon=1e-10):
+        return [abs(d) < epsilon for d in self.dot_product(other)]
+
+    # -----------------------------------------------------------------------------
+    # is_parallel(self, other, epsilon):
+    #   Batched Vector.is_parallel(): a pair is parallel if either vector is the zero
+    #   vector or if the dot product of the unit vectors is within epsilon of -1 or 1.
+    #   |v • w| = |v| |w| |cos θ| is evaluated directly so no unit vectors are built.
+    #
+    # Returns:
+    #   list of bool, one per vector
+    def is_parallel(self, other, epsilon=1e-10):
+        dots = self.dot_product(other)
+        mags = self.get_mag()
+
+        if isinstance(other, Vector):
+            other_mags = [float(other.get_mag())] * self.size
+        else:
+            other_mags = other.get_mag()
+
+        result = []
+        for d, m1, m2 in zip(dots, mags, other_mags):
+            if m1 < epsilon or m2 < epsilon:
+                result.append(True)
+            else:
+                result.append(abs(abs(d) / (m1 * m2) - 1) < epsilon)
+        return result
+
+    # -----------------------------------------------------------------------------
+    # cross_prod(self, other):
+    #   Cross product of each vector in the batch with the matching vector of 'other'
+    #   (or with a single Vector). 2-dimensional vectors are treated as having a zero
+    #   third coordinate, as in Vector.cross_prod(), without padding the buffers.
+    #
+    # Arguments:
+    #   self: a VectorBatch object of dimension 2 or 3
+    #   other: a VectorBatch object of the same size and dimension, or a Vector
+    #
+    # Returns:
+    #   a VectorBatch object of dimension 3
+    def cross_prod(self, other):
+        if not (self.dimension == 2 or self.dimension == 3):
+            raise Exception("The rank of one or more vectors violates {dim ϵ (2, 3)}")
+        elif self.dimension != other.dimension:
+            raise Exception("Both vectors are not of the same rank")
+
+        if isinstance(other, Vector):
+            others = [[float(x) for x in other.coordinates]] * self.size
+        else:
+            self.test_same_size(other)
+            others = other.rows()
+
+        data = array('d')
+        if self.dimension == 2:
+            for (v0, v1), (w0, w1) in zip(self.rows(), others):
+                data.extend((0.0, 0.0, v0 * w1 - w0 * v1))
+        else:
+            for (v0, v1, v2), (w0, w1, w2) in zip(self.rows(), others):
+                data.extend((v1 * w2 - w1 * v2, w0 * v2 - v0 * w2, v0 * w1 - w0 * v1))
+
+        return VectorBatch(data, 3)
+
+    def area_parallelogram(self, other):
+        return self.cross_prod(other).get_mag()
+
+    def area_triangle(self, other):
+        return array('d', [a / 2.0 for a in self.area_parallelogram(other)])
+
+    def _normalized(self, other):
+        if isinstance(other, Vector):
+            return other.to_backend(FLOAT64).normalize()
+        return other.normalize()
+
+    def test_same_size(self, other):
+        try:
+            assert (self.size, self.dimension) == (other.size, other.dimension)
+
+        except AssertionError:
+            raise Exception(self.BATCHES_MUST_BE_THE_SAME_SIZE_MSG)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError('VectorBatch index out of range')
+        return Vector(self.data[i * self.dimension:(i + 1) * self.dimension], FLOAT64)
+
+    def __iter__(self):
+        return iter(self.to_vectors())
+
+    def __str__(self):
+        return 'VectorBatch: {} vectors of dimension {}'.format(self.size, self.dimension)
+
+
+def test():
+    vectors = [Vector([-7.579, -7.88]), Vector([-2.328, -7.284]), Vector([2.118, 4.827])]
+    others = [Vector([22.737, 23.64]), Vector([-1.821, 0.582]), Vector([0, 0])]
+
+    batch = VectorBatch.from_vectors(vectors)
+    other_batch = VectorBatch.from_vectors(others)
+
+    print(batch)
+    print('dot products:', [round(x, 3) for x in batch.dot_product(other_batch)])
+    print('magnitudes:', [round(x, 3) for x in batch.get_mag()])
+    print('is parallel:', batch.is_parallel(other_batch))
+    print('is orthogonal:', batch.is_orthogonal(other_batch))
+    print('angles to first vector:', [round(x, 3) for x in batch.get_angle(vectors[0])])
+    print('triangle areas:', [round(x, 3) for x in batch.area_triangle(other_batch)])
+    print('round trip:', [str(round(v, 3)) for v in batch.to_vectors()])
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,211 @@
+import heapq
+import math
+from operator import mul
+
+from vector import Vector
+from vector_batch import VectorBatch
+
+
+class VectorIndex(object):
+
+    CANNOT_QUERY_ZERO_VECTOR_MSG = 'Cannot compute an angle with the zero vector'
+    DIMENSION_MISMATCH_MSG = 'The query must have the same dimension as the indexed vectors'
+
+    # -----------------------------------------------------------------------------
+    # VectorIndex(vectors, leaf_size):
+    #   Index a collection of vectors for angle queries. Every vector is normalized
+    #   once and the unit vectors are organized in a KD-tree. Since for unit vectors
+    #   |u - v|² = 2 - 2cos θ, the vectors closest in angle to a query are its
+    #   nearest neighbours in euclidean distance, which the tree finds without
+    #   visiting every vector.
+    #
+    #   Zero vectors have no direction: they never appear in angle queries and are
+    #   parallel to everything, as in Vector.is_parallel().
+    #
+    # Arguments:
+    #   vectors: nonempty list of Vector objects of the same dimension
+    #   leaf_size: maximum number of vectors stored in a leaf of the tree
+    def __init__(self, vectors, leaf_size=16):
+        batch = VectorBatch.from_vectors(vectors)
+        self.dimension = batch.dimension
+        self.size = batch.size
+        self.leaf_size = leaf_size
+        self.units = []             # (position, unit coordinates) of every non-zero vector
+        self.zero_ids = []
+
+        for i, (v, mag) in enumerate(zip(batch.rows(), batch.get_mag())):
+            if mag < 1e-10:
+                self.zero_ids.append(i)
+            else:
+                self.units.append((i, tuple(x / mag for x in v)))
+
+        self.root = self._build(self.units)
+
+    # -----------------------------------------------------------------------------
+    # A node is either a leaf: ('leaf', [(i, unit), ...], lower, upper) or a split:
+    # ('split', axis, value, left, right, lower, upper) where 'lower'/'upper' are
+    # the corners of the bounding box of every unit vector under the node.
+    def _build(self, points):
+        lower = [min(p[1][a] for p in points) for a in range(self.dimension)] if points else []
+        upper = [max(p[1][a] for p in points) for a in range(self.dimension)] if points else []
+
+        if len(points) <= self.leaf_size:
+            return ('leaf', points, lower, upper)
+
+        axis = max(range(self.dimension), key=lambda a: upper[a] - lower[a])
+        points = sorted(points, key=lambda p: p[1][axis])
+        middle = len(points) // 2
+
+        return ('split', axis, points[middle][1][axis],
+                self._build(points[:middle]), self._build(points[middle:]), lower, upper)
+
+    @staticmethod
+    def _box_distance(q, lower, upper):
+        d = 0.0
+        for x, lo, hi in zip(q, lower, upper):
+            if x < lo:
+                d += (lo - x) ** 2
+            elif x > hi:
+                d += (x - hi) ** 2
+        return d
+
+    def _unit_query(self, query):
+        if query.dimension != self.dimension:
+            raise Exception(self.DIMENSION_MISMATCH_MSG)
+
+        coordinates = [float(x) for x in query.coordinates]
+        mag = math.hypot(*coordinates)
+        if mag < 1e-10:
+            raise Exception(self.CANNOT_QUERY_ZERO_VECTOR_MSG)
+
+        return [x / mag for x in coordinates]
+
+    @staticmethod
+    def _angle(q, unit):
+        return math.acos(max(-1.0, min(1.0, sum(map(mul, q, unit)))))
+
+    # -----------------------------------------------------------------------------
+    # nearest_by_angle(self, query, k):
+    #   Find the k indexed vectors with the smallest angle to 'query' using a best
+    #   first traversal of the tree.
+    #
+    # Arguments:
+    #   self: a VectorIndex object
+    #   query: a Vector object
+    #   k: number of vectors to return (none when k <= 0)
+    #
+    # Returns:
+    #   list of (position, angle in radians) sorted by increasing angle, where
+    #   position indexes the collection the index was built from
+    def nearest_by_angle(self, query, k=1):
+        q = self._unit_query(query)
+        if k <= 0:
+            return []
+        best = []                                       # max-heap of (-distance², position, unit)
+        nodes = [(0.0, 0, self.root)]                   # min-heap of (box distance², tie-break, node)
+        counter = 1
+
+        while nodes:
+            box_d, _, node = heapq.heappop(nodes)
+            if len(best) == k and box_d > -best[0][0]:
+                break
+
+            if node[0] == 'leaf':
+                for i, unit in node[1]:
+                    d = sum((a - b) ** 2 for a, b in zip(q, unit))
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, i, unit))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, i, unit))
+            else:
+                for child in node[3:5]:
+                    heapq.heappush(nodes, (self._box_distance(q, child[-2], child[-1]), counter, child))
+                    counter += 1
+
+        return sorted(((i, self._angle(q, unit)) for _, i, unit in best), key=lambda r: (r[1], r[0]))
+
+    # -----------------------------------------------------------------------------
+    # parallel_to(self, query, epsilon):
+    #   Find every indexed vector parallel to 'query' in the sense of
+    #   Vector.is_parallel(): |u • q| within epsilon of 1. This is a range query of
+    #   radius sqrt(2 * epsilon) around both q and -q.
+    #
+    # Arguments:
+    #   self: a VectorIndex object
+    #   query: a Vector object
+    #   epsilon: allowable tolerance between |u • q| and 1
+    #
+    # Returns:
+    #   sorted list of positions of the parallel vectors (zero vectors included)
+    def parallel_to(self, query, epsilon=1e-10):
+        try:
+            q = self._unit_query(query)
+
+        except Exception as e:
+            if str(e) == self.CANNOT_QUERY_ZERO_VECTOR_MSG:     # the zero vector is parallel to any vector
+                return list(range(self.size))
+            raise e
+
+        found = set(self.zero_ids)
+        for direction in (q, [-x for x in q]):
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                if self._box_distance(direction, node[-2], node[-1]) > 2 * epsilon:
+                    continue
+
+                if node[0] == 'leaf':
+                    for i, unit in node[1]:
+                        if sum(map(mul, direction, unit)) > 1 - epsilon:
+                            found.add(i)
+                else:
+                    stack.extend(node[3:5])
+
+        return sorted(found)
+
+    # -----------------------------------------------------------------------------
+    # brute_force_nearest_by_angle(self, query, k), brute_force_parallel_to(...):
+    #   Exact linear scans returning the same results as the tree queries, used to
+    #   validate them.
+    def brute_force_nearest_by_angle(self, query, k=1):
+        q = self._unit_query(query)
+        angles = [(i, self._angle(q, unit)) for i, unit in self.units]
+        return sorted(angles, key=lambda r: (r[1], r[0]))[:max(k, 0)]
+
+    def brute_force_parallel_to(self, query, epsilon=1e-10):
+        try:
+            q = self._unit_query(query)
+
+        except Exception as e:
+            if str(e) == self.CANNOT_QUERY_ZERO_VECTOR_MSG:
+                return list(range(self.size))
+            raise e
+
+        parallel = [i for i, unit in self.units if abs(sum(map(mul, q, unit))) > 1 - epsilon]
+        return sorted(parallel + self.zero_ids)
+
+    def __len__(self):
+        return self.size
+
+
+def test():
+    import random
+
+    random.seed(0)
+    vectors = [Vector([random.uniform(-1, 1) for _ in range(3)], 'float64') for _ in range(2000)]
+    vectors.append(Vector([0, 0, 0]))
+    vectors.append(vectors[0].scalar_mult(-2.5))
+
+    index = VectorIndex(vectors)
+    query = vectors[0]
+
+    print('nearest by angle:', [(i, round(a, 6)) for i, a in index.nearest_by_angle(query, k=3)])
+    print('brute force:', [(i, round(a, 6)) for i, a in index.brute_force_nearest_by_angle(query, k=3)])
+    print('k = 0 and k = -1:', index.nearest_by_angle(query, k=0), index.nearest_by_angle(query, k=-1),
+          index.brute_force_nearest_by_angle(query, k=-1))
+    print('parallel to query:', index.parallel_to(query))
+    print('brute force:', index.brute_force_parallel_to(query))
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,230 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from decimal import Decimal
+
+from vector import Vector
+from vector_batch import VectorBatch
+from numeric import FLOAT64
+
+# -----------------------------------------------------------------------------
+# On-disk format (little-endian):
+#   header (32 bytes): magic b'VECS', format version (uint16), storage type
+#       (b'd' float64 or b'q' fixed-point int64), padding byte, dimension (uint32),
+#       vector count (uint64), fixed-point decimal places (int32), reserved
+#   data: count * dimension values, row-major. Fixed-point values store
+#       round(x * 10**places) and are read back as exact Decimals.
+MAGIC = b'VECS'
+VERSION = 1
+HEADER = struct.Struct('<4sHcxIQi4x')
+
+
+class VectorStore(object):
+
+    NOT_A_VECTOR_STORE_MSG = 'The file is not a vector store'
+    UNSUPPORTED_PLATFORM_MSG = 'Vector stores can only be memory-mapped on little-endian platforms'
+    FILE_SIZE_MISMATCH_MSG = 'The size of the vector store file does not match its header (truncated or corrupted file)'
+
+    # -----------------------------------------------------------------------------
+    # VectorStore(path):
+    #   Open a file written by save_vectors() by memory-mapping it. Nothing is read
+    #   up front: pages are loaded by the OS when vectors are accessed, so even very
+    #   large stores open instantly. The 'values' attribute is a zero-copy
+    #   memoryview over all stored numbers. The header (magic, version, storage
+    #   type) and the file size it implies are checked before mapping the file.
+    #
+    # Arguments:
+    #   path: path of a vector store file
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise Exception(self.UNSUPPORTED_PLATFORM_MSG)
+
+        self.file = open(path, 'rb')
+        try:
+            header = self.file.read(HEADER.size)
+            magic, version, typecode, self.dimension, self.size, self.places = HEADER.unpack(header)
+            assert magic == MAGIC and version == VERSION and typecode in (b'd', b'q')
+            assert self.dimension > 0 or self.size == 0
+
+        except (struct.error, AssertionError):
+            self.file.close()
+            raise Exception(self.NOT_A_VECTOR_STORE_MSG)
+
+        if os.fstat(self.file.fileno()).st_size != HEADER.size + 8 * self.size * self.dimension:
+            self.file.close()
+            raise Exception(self.FILE_SIZE_MISMATCH_MSG)
+
+        self.typecode = typecode.decode()
+        self.fixed_point = self.typecode == 'q'
+
+        if self.size:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.values = memoryview(self.mmap)[HEADER.size:].cast(self.typecode)
+        else:
+            self.mmap = None
+            self.values = memoryview(array(self.typecode))
+
+    # -----------------------------------------------------------------------------
+    # row(self, i):
+    #   Zero-copy view of the stored values of vector i.
+    #
+    # Returns:
+    #   memoryview of float64 (or fixed-point int64) values
+    def row(self, i):
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError('VectorStore index out of range')
+        return self.values[i * self.dimension:(i + 1) * self.dimension]
+
+    # -----------------------------------------------------------------------------
+    # batch(self, start, stop):
+    #   Copy vectors [start, stop) into a VectorBatch for batched computation.
+    #   Fixed-point values are converted to float64.
+    def batch(self, start=0, stop=None):
+        stop = self.size if stop is None else min(stop, self.size)
+        values = self.values[start * self.dimension:stop * self.dimension]
+        if self.fixed_point:
+            scale = 10.0 ** -self.places
+            return VectorBatch(array('d', [x * scale for x in values]), self.dimension)
+        return VectorBatch(array('d', values), self.dimension)
+
+    def chunks(self, chunk_size=65536):
+        for start in range(0, self.size, chunk_size):
+            yield self.batch(start, start + chunk_size)
+
+    def __getitem__(self, i):
+        values = self.row(i)
+        if self.fixed_point:
+            return Vector([Decimal(x).scaleb(-self.places) for x in values])
+        return Vector(values, FLOAT64)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def __len__(self):
+        return self.size
+
+    # -----------------------------------------------------------------------------
+    # close(self):
+    #   Unmap the file. Views returned by row() must have been released before.
+    def close(self):
+        self.values.release()
+        if self.mmap is not None:
+            self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __str__(self):
+        return 'VectorStore: {} vectors of dimension {} ({})'.format(
+            self.size, self.dimension, 'fixed-point, {} places'.format(self.places) if self.fixed_point else 'float64')
+
+
+# -----------------------------------------------------------------------------
+# save_vectors(path, vectors, places):
+#   Write a collection of vectors in the binary vector store format. Vectors are
+#   written as they are consumed, so 'vectors' may be a generator.
+#
+# Arguments:
+#   path: path of the file to (over)write
+#   vectors: iterable of Vector objects (or coordinate sequences) of the same
+#       dimension, or a VectorBatch
+#   places: None to store float64 values, or the number of decimal places kept by
+#       fixed-point storage (exact for Decimal inputs with at most that many places)
+#
+# Returns:
+#   the number of vectors written
+def save_vectors(path, vectors, places=None):
+    typecode = 'd' if places is None else 'q'
+    scale = None if places is None else Decimal(1).scaleb(places)
+    dimension = None
+    count = 0
+
+    if isinstance(vectors, VectorBatch) and places is None:
+        rows = [vectors.data]
+        dimension, count = vectors.dimension, vectors.size
+    else:
+        rows = vectors
+
+    with open(path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)                    # placeholder, the count is only known at the end
+
+        for v in rows:
+            if rows is vectors:
+                coordinates = v.coordinates if isinstance(v, Vector) else v
+                if dimension is None:
+                    dimension = len(coordinates)
+                elif len(coordinates) != dimension:
+                    raise Exception(VectorBatch.ALL_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+                count += 1
+            else:
+                coordinates = v
+
+            if scale is None and isinstance(coordinates, array) and coordinates.typecode == 'd' \
+                    and sys.byteorder == 'little':
+                coordinates.tofile(f)                   # VectorBatch buffers are written without a copy
+                continue
+
+            if scale is None:
+                values = array('d', [float(x) for x in coordinates])
+            else:
+                values = array('q', [int((_to_decimal(x) * scale).to_integral_value()) for x in coordinates])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            values.tofile(f)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, typecode.encode(), dimension or 0, count, places or 0))
+
+    return count
+
+
+def _to_decimal(x):
+    return Decimal(repr(x)) if isinstance(x, float) else Decimal(x)    # 0.1 is stored as 0.1, not its binary value
+
+
+def test():
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    vectors = [Vector(['8.218', '-9.341', '1']), Vector(['-1.129', '2.111', '0']), Vector(['7.119', '8.215', '-0.5'])]
+
+    path = os.path.join(directory, 'vectors.bin')
+    save_vectors(path, vectors)
+    with VectorStore(path) as store:
+        print(store)
+        print('second vector:', store[1])
+        print('zero-copy row:', store.row(2).tolist())
+        print('magnitudes:', [round(m, 3) for m in store.batch().get_mag()])
+
+    path = os.path.join(directory, 'vectors_fixed.bin')
+    save_vectors(path, (v for v in vectors), places=3)
+    with VectorStore(path) as store:
+        print(store)
+        print('exact round trip:', all(a == b for a, b in zip(store, vectors)))
+
+    with open(path, 'r+b') as f:                        # drop the last value
+        f.truncate(os.path.getsize(path) - 8)
+    with open(os.path.join(directory, 'not_a_store.bin'), 'wb') as f:
+        f.write(b'\0' * 40)
+    for name in (path, os.path.join(directory, 'not_a_store.bin')):
+        try:
+            VectorStore(name)
+        except Exception as e:
+            print(e)
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,236 @@
+import math
+from array import array
+
+from vector_batch import VectorBatch
+from linsys import LinearSystem
+
+
+class LinearSystemBatch(object):
+
+    ALL_SYSTEMS_MUST_BE_SQUARE_MSG = 'All systems in the batch should have n equations in the same n variables'
+    ONE_CONSTANT_TERM_PER_EQUATION_MSG = 'There must be one constant term per equation'
+
+    UNIQUE_SOLUTION = 0         # status codes returned by solve()
+    NO_SOLUTIONS = 1
+    INF_SOLUTIONS = 2
+    STATUS_MSGS = ('Unique solution', LinearSystem.NO_SOLUTIONS_MSG, LinearSystem.INF_SOLUTIONS_MSG)
+
+    # -----------------------------------------------------------------------------
+    # LinearSystemBatch(coefficients, constant_terms, dimension):
+    #   Store N independent systems of n equations in n variables in two
+    #   contiguous row-major float64 buffers, as VectorBatch does for vectors:
+    #   system s has its coefficient matrix in coefficients[s*n*n:(s+1)*n*n] (one
+    #   equation after the other) and its constant terms in
+    #   constant_terms[s*n:(s+1)*n]. No Plane, Vector or LinearSystem object is
+    #   built per system.
+    #
+    # Arguments:
+    #   coefficients: array('d') (or any iterable of numbers) holding N*n*n values
+    #   constant_terms: array('d') (or any iterable of numbers) holding N*n values
+    #   dimension: the number n of variables (and of equations) of every system
+    def __init__(self, coefficients, constant_terms, dimension):
+        if dimension < 1:
+            raise ValueError('The dimension must be a positive integer')
+
+        self.coefficients = coefficients if isinstance(coefficients, array) and coefficients.typecode == 'd' \
+            else array('d', coefficients)
+        self.constant_terms = constant_terms if isinstance(constant_terms, array) and constant_terms.typecode == 'd' \
+            else array('d', constant_terms)
+        self.dimension = dimension
+
+        self.size, remainder = divmod(len(self.coefficients), dimension * dimension)
+        if remainder:
+            raise Exception(self.ALL_SYSTEMS_MUST_BE_SQUARE_MSG)
+        if len(self.constant_terms) != self.size * dimension:
+            raise Exception(self.ONE_CONSTANT_TERM_PER_EQUATION_MSG)
+
+    # -----------------------------------------------------------------------------
+    # from_systems(systems):
+    #   Pack LinearSystem objects of n equations in n variables into a batch.
+    #
+    # Arguments:
+    #   systems: nonempty iterable of LinearSystem objects of the same dimension
+    #
+    # Returns:
+    #   a LinearSystemBatch object
+    @classmethod
+    def from_systems(cls, systems):
+        coefficients = array('d')
+        constant_terms = array('d')
+        dimension = None
+
+        for system in systems:
+            if dimension is None:
+                dimension = system.dimension
+            if system.dimension != dimension or len(system) != dimension:
+                raise Exception(cls.ALL_SYSTEMS_MUST_BE_SQUARE_MSG)
+            for p in system.planes:
+                coefficients.extend(float(x) for x in p.normal_vector.coordinates)
+                constant_terms.append(float(p.constant_term))
+
+        if dimension is None:
+            raise ValueError('The batch must contain at least one system')
+
+        return cls(coefficients, constant_terms, dimension)
+
+    # -----------------------------------------------------------------------------
+    # solve(self, tolerance):
+    #   Solve every system of the batch. Systems of 2 or 3 variables are solved
+    #   in one pass over the buffers with Cramer's rule; a system is treated as
+    #   singular when |det A| <= tolerance · |row 1| ··· |row n|, the bound of
+    #   Hadamard's inequality, so the test does not depend on the scale of A.
+    #   Singular systems, and all systems of other dimensions, go through Gaussian
+    #   elimination with partial pivoting to tell NO_SOLUTIONS from INF_SOLUTIONS.
+    #   There, a pivot is zero when it is at most tolerance times the largest
+    #   coefficient of its column, and a row 0 = k is a contradiction when |k|
+    #   exceeds tolerance times the largest constant term: the scale of the
+    #   constant terms does not change which pivots are found.
+    #
+    # Arguments:
+    #   self: a LinearSystemBatch object
+    #   tolerance: relative tolerance of the singularity and consistency tests
+    #
+    # Returns:
+    #   (solutions, statuses):
+    #      solutions: VectorBatch of dimension n, one solution per system: the
+    #         solution if it is unique, the basepoint of the parametrization
+    #         (free variables 0) for INF_SOLUTIONS, and NaNs for NO_SOLUTIONS
+    #      statuses: array('b') of status codes, STATUS_MSGS[code] being the
+    #         matching message
+    def solve(self, tolerance=1e-10):
+        n = self.dimension
+        if n == 2:
+            solutions, statuses = self._cramer_2(tolerance)
+        elif n == 3:
+            solutions, statuses = self._cramer_3(tolerance)
+        else:
+            solutions, statuses = array('d', bytes(8 * n * self.size)), array('b', bytes(self.size))
+            statuses[:] = array('b', [self.NO_SOLUTIONS]) * self.size        # all go through elimination
+
+        for s in range(self.size):
+            if statuses[s] != self.UNIQUE_SOLUTION:
+                statuses[s], solutions[s*n:(s+1)*n] = self._eliminate(s, tolerance)
+
+        return VectorBatch(solutions, n), statuses
+
+    def _cramer_2(self, tolerance):
+        solutions = array('d')
+        statuses = array('b')
+        it = iter(self.constant_terms)
+
+        for (a, b, c, d), (p, q) in zip(zip(*[iter(self.coefficients)] * 4), zip(it, it)):
+            det = a * d - b * c
+            if abs(det) <= tolerance * math.hypot(a, b) * math.hypot(c, d):
+                solutions.extend((math.nan, math.nan))
+                statuses.append(self.NO_SOLUTIONS)
+                continue
+            solutions.extend(((p * d - b * q) / det, (a * q - p * c) / det))
+            statuses.append(self.UNIQUE_SOLUTION)
+
+        return solutions, statuses
+
+    def _cramer_3(self, tolerance):
+        solutions = array('d')
+        statuses = array('b')
+        it = iter(self.constant_terms)
+
+        for (a, b, c, d, e, f, g, h, i), (p, q, r) in zip(zip(*[iter(self.coefficients)] * 9), zip(it, it, it)):
+            c00, c01, c02 = e * i - f * h, f * g - d * i, d * h - e * g        # cofactors of the first row
+            det = a * c00 + b * c01 + c * c02
+            if abs(det) <= tolerance * math.hypot(a, b, c) * math.hypot(d, e, f) * math.hypot(g, h, i):
+                solutions.extend((math.nan, math.nan, math.nan))
+                statuses.append(self.NO_SOLUTIONS)
+                continue
+            solutions.extend(((c00 * p + (c * h - b * i) * q + (b * f - c * e) * r) / det,
+                              (c01 * p + (a * i - c * g) * q + (c * d - a * f) * r) / det,
+                              (c02 * p + (b * g - a * h) * q + (a * e - b * d) * r) / det))
+            statuses.append(self.UNIQUE_SOLUTION)
+
+        return solutions, statuses
+
+    def _eliminate(self, s, tolerance):
+        # reduced row echelon form of system s, with partial pivoting
+        n = self.dimension
+        A = self.coefficients
+        rows = [list(A[(s*n + i)*n:(s*n + i + 1)*n]) + [self.constant_terms[s*n + i]] for i in range(n)]
+        pivot_eps = [tolerance * max(abs(row[j]) for row in rows) for j in range(n)]     # per column
+        constant_eps = tolerance * max(abs(row[n]) for row in rows)
+        pivots = []
+
+        for col in range(n):
+            r = len(pivots)
+            if r == n:
+                break
+            pivot_row = max(range(r, n), key=lambda i: abs(rows[i][col]))
+            if abs(rows[pivot_row][col]) <= pivot_eps[col]:
+                continue
+            rows[r], rows[pivot_row] = rows[pivot_row], rows[r]
+
+            pivot_term = rows[r][col]
+            pivot = rows[r] = [x / pivot_term for x in rows[r]]
+            for i in range(n):
+                factor = rows[i][col]
+                if i != r and factor != 0:
+                    rows[i] = [x - factor * y for x, y in zip(rows[i], pivot)]
+            pivots.append(col)
+
+        if any(abs(rows[i][n]) > constant_eps for i in range(len(pivots), n)):     # 0 = k with k nonzero
+            return self.NO_SOLUTIONS, array('d', [math.nan] * n)
+
+        solution = array('d', bytes(8 * n))
+        for row, col in zip(rows, pivots):
+            solution[col] = row[n]
+        return (self.UNIQUE_SOLUTION if len(pivots) == n else self.INF_SOLUTIONS), solution
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return 'LinearSystemBatch: {0} systems of {1} equations in {1} variables'.format(self.size, self.dimension)
+
+
+def test():
+    from vector import Vector
+    from plane import Plane
+    from hyperplane import Hyperplane
+
+    p1 = Plane(normal_vector=Vector(['0', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['1', '-1', '1']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['1', '2', '-5']), constant_term='3')
+    unique = LinearSystem([p1, p2, p3])
+
+    p1 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['0', '1', '0']), constant_term='2')
+    inconsistent = LinearSystem([p1, p2, p3])
+
+    p2 = Plane(normal_vector=Vector(['2', '2', '2']), constant_term='2')
+    infinite = LinearSystem([p1, p2, p3])
+
+    systems = [unique, inconsistent, infinite]
+    batch = LinearSystemBatch.from_systems(systems)
+    print(batch)
+    solutions, statuses = batch.solve()
+    for system, solution, status in zip(systems, solutions, statuses):
+        print(LinearSystemBatch.STATUS_MSGS[status], round(solution, 3))
+        print(system.solve_system())
+
+    # 2 x 2, straight from the buffers: x + y = 3, x - y = 1 and two parallel lines
+    solutions, statuses = LinearSystemBatch([1, 1, 1, -1, 1, 2, 2, 4], [3, 1, 1, 3], 2).solve()
+    print([LinearSystemBatch.STATUS_MSGS[s] for s in statuses], round(solutions[0], 3))
+
+    # other dimensions use elimination
+    s = LinearSystem([Hyperplane([(i * 5 + j * 3) % 7 - 3 for j in range(4)], i) for i in range(4)])
+    solutions, statuses = LinearSystemBatch.from_systems([s]).solve()
+    print(LinearSystemBatch.STATUS_MSGS[statuses[0]], round(solutions[0], 3))
+    print(s.solve_system())
+
+    # constant terms much larger than the coefficients: both paths find the pivots
+    for n in (3, 4):
+        identity = [1e-6 if i == j else 0.0 for i in range(n) for j in range(n)]
+        solutions, statuses = LinearSystemBatch(identity, [1e6] * n, n).solve()
+        print(n, LinearSystemBatch.STATUS_MSGS[statuses[0]], list(solutions.data))
+
+
+if __name__ == '__main__':
+    test()
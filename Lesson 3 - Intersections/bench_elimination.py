@@ -0,0 +1,49 @@
+# Benchmark of the in-place AugmentedMatrix engine against LinearSystem.solve_system().
+#
+#   python bench_elimination.py [max_n_for_linear_system]
+#
+# Solves random dense n x n Decimal systems of Hyperplanes for n = 10, 100, 500.
+# LinearSystem rebuilds a Vector and a Hyperplane on every row operation and
+# rescans the first nonzero terms of all rows for every pair of rows, so it is
+# only run up to max_n_for_linear_system (100 by default).
+
+import random
+import sys
+import time
+
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+from elimination import AugmentedMatrix
+
+
+def random_system(n, seed=0):
+    rng = random.Random(seed)
+    return LinearSystem([Hyperplane([str(rng.randint(-99, 99)) for _ in range(n)], str(rng.randint(-99, 99)))
+                         for _ in range(n)])
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+def main(max_n):
+    print('{:>6}{:>18}{:>18}{:>10}'.format('n', 'LinearSystem', 'AugmentedMatrix', 'speedup'))
+
+    for n in (10, 100, 500):
+        system = random_system(n)
+        new_time, new_solution = timed(lambda: AugmentedMatrix(system).solve_system())
+
+        if n > max_n:
+            print('{:>6}{:>18}{:>16.3f} s{:>10}'.format(n, 'skipped', new_time, '-'))
+            continue
+
+        old_time, old_solution = timed(system.solve_system)
+        same = str(old_solution) == str(new_solution)
+        print('{:>6}{:>16.3f} s{:>16.3f} s{:>9.1f}x{}'.format(
+            n, old_time, new_time, old_time / new_time, '' if same else '  (solutions differ)'))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
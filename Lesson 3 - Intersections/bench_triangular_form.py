@@ -0,0 +1,87 @@
+# Scaling benchmark of LinearSystem.compute_triangular_form() and Matrix.get_ref().
+#
+#   python bench_triangular_form.py [largest_n]
+#
+# Times both methods on random dense Decimal n x n problems, doubling n, next to
+# the previous triangular form that rescanned the first nonzero terms of every
+# row for every pair of rows. The exponent column is log2(t(n) / t(n/2)): about 3
+# for O(n³) elimination, about 4 for the rescanning version.
+
+import math
+import random
+import sys
+import time
+from copy import deepcopy
+
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+from matrix import Matrix
+
+
+def rescanning_triangular_form(self):
+    # the previous compute_triangular_form(), kept for comparison
+    system = deepcopy(self)
+    rank = len(system)
+
+    for row_i in range(rank-1):
+        fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()
+        lower_row_fnzt_indices = fnzt_indices[row_i+1:]
+        smallest_fnzt_index = min(lower_row_fnzt_indices)
+
+        if smallest_fnzt_index < fnzt_indices[row_i]:
+            row_to_swap = lower_row_fnzt_indices.index(smallest_fnzt_index) + row_i + 1
+            system.swap_rows(row_i, row_to_swap)
+
+        for row_j in range(row_i+1, rank):
+            fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()
+
+            if fnzt_indices[row_i] == fnzt_indices[row_j]:
+                numerator = system[row_j].normal_vector[fnzt_indices[row_j]]
+                denominator = system[row_i].normal_vector[fnzt_indices[row_i]]
+                beta = - numerator / denominator
+                system.add_multiple_times_row_to_row(beta, row_i, row_j)
+
+    return system
+
+
+def random_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [[rng.randint(-99, 99) for _ in range(n + 1)] for _ in range(n)]
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - start
+
+
+def main(largest_n):
+    columns = ('rescanning', 'triangular form', 'Matrix.get_ref')
+    print('{:>6}'.format('n') + ''.join('{:>18}{:>6}'.format(c, 'exp') for c in columns))
+
+    previous = None
+    n = 10
+    while n <= largest_n:
+        rows = random_rows(n)
+        system = LinearSystem([Hyperplane(r[:-1], r[-1]) for r in rows])
+        matrix = Matrix([r[:-1] for r in rows])
+
+        times = (timed(rescanning_triangular_form, system) if n <= 40 else None,
+                 timed(system.compute_triangular_form),
+                 timed(matrix.get_ref, None))
+
+        line = '{:>6}'.format(n)
+        for i, t in enumerate(times):
+            if t is None:
+                line += '{:>18}{:>6}'.format('skipped', '-')
+                continue
+            exponent = '-' if previous is None or previous[i] is None else '{:.1f}'.format(math.log2(t / previous[i]))
+            line += '{:>16.3f} s{:>6}'.format(t, exponent)
+        print(line)
+
+        previous = times
+        n *= 2
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 160)
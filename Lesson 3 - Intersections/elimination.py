@@ -0,0 +1,390 @@
+import math
+from decimal import getcontext
+from fractions import Fraction
+
+from vector import Vector
+from numeric import FRACTION, precision
+from linsys import LinearSystem, Parametrization
+
+getcontext().prec = 30
+
+
+class AugmentedMatrix(object):
+
+    UNKNOWN_PIVOTING_STRATEGY_MSG = 'Unknown pivoting strategy'
+
+    FIRST_NONZERO = 'first_nonzero'     # pivoting strategies
+    PARTIAL = 'partial'
+    COMPLETE = 'complete'
+    ROOK = 'rook'
+
+    # -----------------------------------------------------------------------------
+    # AugmentedMatrix(system, pivoting):
+    #   Gaussian elimination engine working on a dense copy of a LinearSystem: one
+    #   mutable list [a_1, ..., a_n, k] per equation. The system is copied once;
+    #   swaps and row operations then update these lists in place, so no Vector or
+    #   Plane object is created until to_system() or solve_system() builds the
+    #   result. Row updates start at the pivot column, since the entries to its
+    #   left are already zero.
+    #
+    #   With the default FIRST_NONZERO strategy the operations mirror those of
+    #   LinearSystem, so both reach the same reduced row echelon form. The other
+    #   strategies choose large pivots, which keeps the rounding errors of float64
+    #   elimination small:
+    #      - PARTIAL:  the largest entry of the pivot column (row swaps only)
+    #      - COMPLETE: the largest entry of the remaining submatrix (row and
+    #                  column swaps)
+    #      - ROOK:     an entry that is the largest of both its row and its column,
+    #                  found by alternating row and column searches (row and
+    #                  column swaps, usually much fewer comparisons than COMPLETE)
+    #   Swaps are recorded in row_permutation and column_permutation: row i holds
+    #   equation row_permutation[i] of the system, and column j holds variable
+    #   column_permutation[j]. Solutions and to_system() are given in the original
+    #   variable order.
+    #
+    #   With the FRACTION backend the elimination is fraction-free: each equation
+    #   is multiplied by the common denominator of its terms, rows are combined by
+    #   cross-multiplication (pivot · row_j - term · row_i) and divided by the gcd
+    #   of their entries, so the arithmetic stays on Python integers. Fractions
+    #   are only formed at the end of compute_rref(), by dividing each row by its
+    #   pivot. This is what makes the exact mode faster than Decimal elimination
+    #   on small-integer systems; Fraction arithmetic on every row operation is
+    #   not. Pivots are then chosen by the magnitude of the scaled integer entries
+    #   and exact elimination has no rounding to amplify, so growth_factor stays
+    #   None.
+    #
+    # Arguments:
+    #   system: a LinearSystem object (left unchanged)
+    #   pivoting: one of the pivoting strategies above
+    def __init__(self, system, pivoting=FIRST_NONZERO):
+        if pivoting not in (self.FIRST_NONZERO, self.PARTIAL, self.COMPLETE, self.ROOK):
+            raise Exception(self.UNKNOWN_PIVOTING_STRATEGY_MSG)
+
+        self.backend = system.backend
+        self.dimension = system.dimension
+        self.row_type = type(system[0])
+        self.rows = [list(p.normal_vector.coordinates) + [p.constant_term] for p in system.planes]
+        self.fraction_free = self.backend is FRACTION
+        if self.fraction_free:
+            self.rows = [self._integral(r) for r in self.rows]
+        self.pivoting = pivoting
+        self.pivots = None
+        self.row_permutation = list(range(len(self.rows)))
+        self.column_permutation = list(range(self.dimension))
+        self.growth_factor = None
+
+    def swap_rows(self, row1, row2):
+        rows = self.rows
+        rows[row1], rows[row2] = rows[row2], rows[row1]
+        p = self.row_permutation
+        p[row1], p[row2] = p[row2], p[row1]
+
+    def swap_columns(self, col1, col2):
+        for r in self.rows:
+            r[col1], r[col2] = r[col2], r[col1]
+        p = self.column_permutation
+        p[col1], p[col2] = p[col2], p[col1]
+
+    def multiply_coefficient_and_row(self, coefficient, row, start=0):
+        coefficient = self.backend.convert(coefficient)
+        r = self.rows[row]
+        for k in range(start, len(r)):
+            r[k] = coefficient * r[k]
+
+    def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to, start=0):
+        coefficient = self.backend.convert(coefficient)
+        a = self.rows[row_to_add]
+        b = self.rows[row_to_be_added_to]
+        for k in range(start, len(b)):
+            b[k] = coefficient * a[k] + b[k]
+
+    # -----------------------------------------------------------------------------
+    # Fraction-free row operations (FRACTION backend, see above):
+    #   _integral() scales a row of Fractions to integers, _cross_eliminate()
+    #   zeroes the entry of row_j in column col with row_i, and _primitive()
+    #   divides an integer row by the gcd of its entries to keep them small.
+    @classmethod
+    def _integral(cls, row):
+        denominators = [x.denominator for x in row]
+        denominator = math.lcm(*denominators)
+        if denominator == 1:
+            return cls._primitive([x.numerator for x in row])
+        return cls._primitive([x.numerator * (denominator // d) for x, d in zip(row, denominators)])
+
+    @staticmethod
+    def _primitive(row):
+        divisor = math.gcd(*row)
+        return [x // divisor for x in row] if divisor > 1 else row
+
+    def _cross_eliminate(self, row_i, row_j, col):
+        a, b = self.rows[row_i], self.rows[row_j]
+        pivot_term, term = a[col], b[col]
+        self.rows[row_j] = self._primitive([pivot_term * y - term * x for x, y in zip(a, b)])
+
+    # -----------------------------------------------------------------------------
+    # compute_triangular_form(self):
+    #   Bring the rows into triangular form in place. For each column a pivot is
+    #   chosen at or below the current row with the pivoting strategy, swapped into
+    #   place, and the entries below it are eliminated.
+    #
+    #   The growth factor max |a_ij| over all the intermediate coefficients divided
+    #   by max |a_ij| of the original coefficients is recorded in growth_factor:
+    #   large values mean that rounding errors may have been amplified (None for
+    #   the fraction-free elimination of the FRACTION backend).
+    #
+    # Returns:
+    #   self, with self.pivots the list of pivot columns (pivot i on row i)
+    def compute_triangular_form(self):
+        rows = self.rows
+        n = self.dimension
+        is_near_zero = self.backend.is_near_zero
+        zero = self.backend.zero
+        pivots = []
+
+        if not self.fraction_free:
+            initial_max = max([abs(x) for r in rows for x in r[:n]])
+            largest = initial_max
+
+        for col in range(n):
+            row_i = len(pivots)
+            if row_i == len(rows):
+                break
+
+            position = self._find_pivot(row_i, col)
+            if position is None:
+                continue                                    # no pivot in this column
+
+            row_j, col_j = position
+            if row_j != row_i:
+                self.swap_rows(row_i, row_j)
+            if col_j != col:
+                self.swap_columns(col, col_j)
+            pivot_term = rows[row_i][col]
+
+            for row_j in range(row_i+1, len(rows)):
+                term = rows[row_j][col]
+                if is_near_zero(term):
+                    continue
+                if self.fraction_free:
+                    self._cross_eliminate(row_i, row_j, col)
+                    continue
+                self.add_multiple_times_row_to_row(-term / pivot_term, row_i, row_j, col + 1)
+                rows[row_j][col] = zero                     # eliminated exactly, not up to rounding
+                if col + 1 < n:
+                    largest = max(largest, max([abs(x) for x in rows[row_j][col+1:n]]))
+
+            pivots.append(col)
+
+        self.pivots = pivots
+        if not self.fraction_free:
+            self.growth_factor = float(largest / initial_max) if initial_max else 1.0
+        return self
+
+    # -----------------------------------------------------------------------------
+    # _find_pivot(self, row_i, col):
+    #   Position of the next pivot among rows row_i.. and (for COMPLETE and ROOK)
+    #   columns col.., or None when all the candidates are zero.
+    def _find_pivot(self, row_i, col):
+        rows = self.rows
+        is_near_zero = self.backend.is_near_zero
+        candidates = range(row_i, len(rows))
+
+        if self.pivoting == self.FIRST_NONZERO:
+            for row_j in candidates:
+                if not is_near_zero(rows[row_j][col]):
+                    return row_j, col
+            return None
+
+        if self.pivoting == self.PARTIAL:
+            row_j = max(candidates, key=lambda j: abs(rows[j][col]))
+            return None if is_near_zero(rows[row_j][col]) else (row_j, col)
+
+        columns = range(col, self.dimension)
+
+        if self.pivoting == self.COMPLETE:
+            row_j, col_j = max(((j, k) for j in candidates for k in columns), key=lambda p: abs(rows[p[0]][p[1]]))
+            return None if is_near_zero(rows[row_j][col_j]) else (row_j, col_j)
+
+        col_j = next((k for k in columns if not all(is_near_zero(rows[j][k]) for j in candidates)), None)
+        if col_j is None:
+            return None
+
+        row_j = max(candidates, key=lambda j: abs(rows[j][col_j]))
+        while True:                                         # rook: move along the row, then the column, to larger
+            k = max(columns, key=lambda k: abs(rows[row_j][k]))     # entries until neither move finds one
+            if abs(rows[row_j][k]) <= abs(rows[row_j][col_j]):
+                return row_j, col_j
+            col_j = k
+
+            j = max(candidates, key=lambda j: abs(rows[j][col_j]))
+            if abs(rows[j][col_j]) <= abs(rows[row_j][col_j]):
+                return row_j, col_j
+            row_j = j
+
+    # -----------------------------------------------------------------------------
+    # compute_rref(self):
+    #   Bring the rows into reduced row echelon form in place: from the last pivot
+    #   row up, scale the pivot to 1 and eliminate the entries above it.
+    #
+    # Returns:
+    #   self
+    def compute_rref(self):
+        if self.pivots is None:
+            self.compute_triangular_form()
+
+        rows = self.rows
+        is_near_zero = self.backend.is_near_zero
+        zero = self.backend.zero
+
+        if self.fraction_free:
+            for row_i in reversed(range(len(self.pivots))):
+                col = self.pivots[row_i]
+                for row_j in range(row_i):
+                    if rows[row_j][col]:
+                        self._cross_eliminate(row_i, row_j, col)
+
+            for row_i, row in enumerate(rows):                  # back to Fractions, each pivot row divided by its pivot
+                pivot_term = row[self.pivots[row_i]] if row_i < len(self.pivots) else 1
+                rows[row_i] = [Fraction(x, pivot_term) if x else zero for x in row]
+            self.fraction_free = False
+            return self
+
+        for row_i in reversed(range(len(self.pivots))):
+            col = self.pivots[row_i]
+            pivot_term = rows[row_i][col]
+
+            if pivot_term != 1:
+                self.multiply_coefficient_and_row(1 / pivot_term, row_i, col + 1)
+                rows[row_i][col] = self.backend.one
+
+            for row_j in range(row_i):
+                term = rows[row_j][col]
+                if is_near_zero(term):
+                    continue
+                self.add_multiple_times_row_to_row(-term, row_i, row_j, col + 1)
+                rows[row_j][col] = zero
+
+        return self
+
+    # -----------------------------------------------------------------------------
+    # solve_system(self, prec):
+    #   Counterpart of LinearSystem.solve_system() computed in place. Every row
+    #   without a pivot is checked for 0 = k, including rows beyond the number of
+    #   variables.
+    #
+    # Arguments:
+    #   prec: Decimal precision for this call only (see numeric.precision)
+    #
+    # Returns:
+    #   a Parametrization object, or LinearSystem.NO_SOLUTIONS_MSG
+    def solve_system(self, prec=None):
+        with precision(prec):
+            self.compute_rref()
+
+            for row in self.rows[len(self.pivots):]:       # rows without a pivot read 0 = k
+                if not self.backend.is_near_zero(row[-1]):
+                    return LinearSystem.NO_SOLUTIONS_MSG
+
+            return self.make_parametric()
+
+    # -----------------------------------------------------------------------------
+    # make_parametric(self):
+    #   Parametrization of the solution set of rows in reduced row echelon form:
+    #   pivot variables are expressed in terms of the free variables, which each
+    #   contribute one direction vector.
+    def make_parametric(self):
+        zero, one = self.backend.zero, self.backend.one
+        n = self.dimension
+        rows = self.rows
+        variable = self.column_permutation
+
+        base_point = [zero] * n
+        for row_i, col in enumerate(self.pivots):
+            base_point[variable[col]] = rows[row_i][-1]
+
+        dir_vectors = []
+        free_columns = sorted(set(range(n)) - set(self.pivots), key=variable.__getitem__)
+        for free in free_columns:
+            direction = [zero] * n
+            direction[variable[free]] = one
+            for row_i, col in enumerate(self.pivots):
+                direction[variable[col]] = -rows[row_i][free]
+            dir_vectors.append(Vector._from_coords(tuple(direction), self.backend))
+
+        return Parametrization(Vector._from_coords(tuple(base_point), self.backend), dir_vectors)
+
+    # -----------------------------------------------------------------------------
+    # to_system(self):
+    #   Materialize the current rows as a LinearSystem, with rows of the same type
+    #   as the original system (Plane, Line or Hyperplane) and the coefficients in
+    #   the original variable order. The integer rows of a fraction-free
+    #   elimination that has not reached compute_rref() are converted to Fractions
+    #   as they are.
+    def to_system(self):
+        equations = []
+        for r in self.rows:
+            coefficients = [None] * self.dimension
+            for col, variable in enumerate(self.column_permutation):
+                coefficients[variable] = r[col]
+            equations.append(self.row_type(Vector._from_coords(self.backend.coords(coefficients), self.backend), r[-1]))
+        return LinearSystem(equations)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __str__(self):
+        return str(self.to_system())
+
+
+def test():
+    from plane import Plane
+    from hyperplane import Hyperplane
+
+    p1 = Plane(normal_vector=Vector(['8.631', '5.112', '-1.816']), constant_term='-5.113')
+    p2 = Plane(normal_vector=Vector(['4.315', '11.132', '-5.27']), constant_term='-6.775')
+    p3 = Plane(normal_vector=Vector(['-2.158', '3.01', '-1.727']), constant_term='-0.831')
+    s = LinearSystem([p1, p2, p3])
+    solution = AugmentedMatrix(s).solve_system()
+    print(solution)
+    points = [solution.basepoint, solution.basepoint + solution.direction_vectors[0]]
+    print('points satisfy every equation:',
+          all(abs(p.normal_vector.dot_product(x) - p.constant_term) < 1e-10 for p in s.planes for x in points))
+
+    p1 = Plane(normal_vector=Vector(['5.862', '1.178', '-10.366']), constant_term='-8.15')
+    p2 = Plane(normal_vector=Vector(['-2.931', '-0.589', '5.183']), constant_term='-4.075')
+    print(AugmentedMatrix(LinearSystem([p1, p2])).solve_system())
+
+    p1 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['0', '1', '1']), constant_term='2')
+    m = AugmentedMatrix(LinearSystem([p1, p2]))
+    print(m.compute_rref())
+    print(m.solve_system())
+
+    h = [Hyperplane(['1', '1', '0', '0', '2'], '4'), Hyperplane(['0', '1', '-1', '0', '0'], '1'),
+         Hyperplane(['0', '0', '1', '1', '-1'], '0'), Hyperplane(['2', '0', '0', '1', '0'], '3'),
+         Hyperplane(['0', '0', '0', '1', '1'], '2')]
+    print(AugmentedMatrix(LinearSystem(h).to_backend('fraction')).solve_system())
+
+    # fraction-free elimination reaches the exact rational solution of LinearSystem
+    s = LinearSystem([Hyperplane([Fraction(1, 3), Fraction(1, 2), 1], 1, backend='fraction'),
+                      Hyperplane([2, Fraction(-1, 7), 0], Fraction(5, 6), backend='fraction'),
+                      Hyperplane([0, 3, Fraction(4, 5)], -2, backend='fraction')])
+    x = AugmentedMatrix(s).solve_system().basepoint
+    print(x.coordinates == s.solve_system().basepoint.coordinates, [str(a) for a in x.coordinates])
+
+    # a tiny first pivot: float64 elimination only stays accurate with pivoting
+    p1 = Plane(normal_vector=Vector(['3e-9', '1', '1']), constant_term='2')
+    p2 = Plane(normal_vector=Vector(['1', '1', '0']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['0', '1', '2']), constant_term='3')
+    s = LinearSystem([p1, p2, p3]).to_backend('float64')
+    exact = AugmentedMatrix(s.to_backend('fraction')).solve_system().basepoint
+    for pivoting in (AugmentedMatrix.FIRST_NONZERO, AugmentedMatrix.PARTIAL,
+                     AugmentedMatrix.COMPLETE, AugmentedMatrix.ROOK):
+        m = AugmentedMatrix(s, pivoting)
+        x = m.solve_system().basepoint
+        print('{:>13}: error {:.1e}, growth factor {:.3g}, rows {}, columns {}'.format(
+            pivoting, max(abs(a - float(b)) for a, b in zip(x, exact)),
+            m.growth_factor, m.row_permutation, m.column_permutation))
+
+if __name__ == '__main__':
+    test()
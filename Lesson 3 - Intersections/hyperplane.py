@@ -0,0 +1,86 @@
+from decimal import Decimal, getcontext
+from vector import Vector
+from plane import Plane
+
+getcontext().prec = 30
+
+
+class Hyperplane(Plane):
+
+    EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG = (
+        'Either the dimension of the hyperplane or the normal vector must be provided')
+
+    # -----------------------------------------------------------------------------
+    # Hyperplane(normal_vector, constant_term, dimension, backend):
+    #   The set of points x of n-dimensional space satisfying n • x = k. Unlike
+    #   Plane, the dimension is taken from the normal vector, and the basepoint is
+    #   only computed the first time it is used (comparisons with ==), so the
+    #   equations created by the row operations of a LinearSystem only hold their
+    #   coefficients: one tuple of numbers and the constant term.
+    #
+    # Arguments:
+    #   normal_vector: a Vector object, or a sequence of coefficients
+    #   constant_term: the constant k, 0 when None
+    #   dimension: the dimension of the space, only needed without a normal vector
+    #   backend: numeric backend of the coefficients (see numeric.py)
+    def __init__(self, normal_vector=None, constant_term=None, dimension=None, backend=None):
+        if normal_vector is None:
+            if not dimension:
+                raise Exception(self.EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG)
+            normal_vector = Vector(['0'] * dimension, backend)
+        elif not isinstance(normal_vector, Vector):
+            normal_vector = Vector(normal_vector, backend)
+        elif backend is not None:
+            normal_vector = normal_vector.to_backend(backend)
+
+        self.dimension = normal_vector.dimension
+        self.normal_vector = normal_vector
+        self.backend = normal_vector.backend
+
+        if constant_term is None:
+            constant_term = Decimal('0')
+        self.constant_term = self.backend.convert(constant_term)
+
+        self._canonical = None
+
+    # basepoint is computed by Plane.set_basepoint() on first access
+    @property
+    def basepoint(self):
+        try:
+            return self._basepoint
+
+        except AttributeError:
+            self.set_basepoint()
+            return self._basepoint
+
+    @basepoint.setter
+    def basepoint(self, basepoint):
+        self._basepoint = basepoint
+
+
+def test():
+    h_1 = Hyperplane(Vector([1, 1, 1, 1, 1]), 5)
+    h_2 = Hyperplane([-2, -2, -2, -2, -2], -10)
+    h_3 = Hyperplane([1, 2, 3, 4, 5], 15)
+    h_4 = Hyperplane(dimension=5)
+
+    print(h_1)
+    print(h_3)
+    print(h_4)
+    print('basepoint of hyperplane 3:', h_3.basepoint)
+
+    print('\nHyperplane 1 is parallel to hyperplane 2: ')
+    print(h_1.is_parallel(h_2))
+
+    print('\nHyperplane 1 is equal to hyperplane 2: ')
+    print(h_1 == h_2)
+    print(h_1 == h_3)
+
+    try:
+        Hyperplane()
+    except Exception as e:
+        print(e)
+
+
+if __name__ == '__main__':
+    test()
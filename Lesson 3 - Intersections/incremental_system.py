@@ -0,0 +1,223 @@
+from bisect import bisect
+from decimal import getcontext
+
+from vector import Vector
+from numeric import get_backend
+from linsys import LinearSystem, Parametrization
+
+getcontext().prec = 30
+
+
+class IncrementalLinearSystem(object):
+
+    ALL_EQUATIONS_MUST_BE_IN_SAME_DIM_MSG = 'All equations in the system should live in the same dimension'
+
+    UNIQUE_SOLUTION_MSG = 'Unique solution'                     # solution status, see status()
+    INF_SOLUTIONS_MSG = LinearSystem.INF_SOLUTIONS_MSG
+    NO_SOLUTIONS_MSG = LinearSystem.NO_SOLUTIONS_MSG
+
+    # -----------------------------------------------------------------------------
+    # IncrementalLinearSystem(dimension, backend):
+    #   A system of linear equations that receives its equations one at a time
+    #   and keeps them in reduced row echelon form as they arrive. Adding an
+    #   equation reduces it against the current pivot rows, then clears its new
+    #   pivot column from them: O(rank·n) operations, instead of the O(m·rank·n)
+    #   elimination of the whole system that LinearSystem.solve_system() repeats
+    #   after every change. The solution status and the parametrization are
+    #   available right after each add_equation().
+    #
+    #   An equation that reduces to 0 = k with k nonzero makes the system
+    #   inconsistent; one that reduces to 0 = 0 is redundant. Both are kept among
+    #   the equations, so that remove_equation() can bring the system back.
+    #
+    # Arguments:
+    #   dimension: the number of variables
+    #   backend: numeric backend of the coefficients (see numeric.py)
+    def __init__(self, dimension, backend=None):
+        self.dimension = dimension
+        self.backend = get_backend(backend)
+        self.equations = []                     # the equations as given, as [a_1, ..., a_n, k] lists
+        self.rows = []                          # the nonzero rows of the RREF, ordered by pivot column
+        self.pivots = []                        # pivot column of each row of the RREF
+        self.inconsistent = 0                   # number of equations that reduced to 0 = k != 0
+        self._parametrization = None
+
+    @classmethod
+    def from_system(cls, system):
+        incremental = cls(system.dimension, system.backend)
+        for p in system.planes:
+            incremental.add_equation(p)
+        return incremental
+
+    # -----------------------------------------------------------------------------
+    # add_equation(self, equation, constant_term):
+    #   Append an equation and update the reduced row echelon form.
+    #
+    # Arguments:
+    #   equation: a Plane, Line or Hyperplane, or the coefficients of the equation
+    #      (a Vector or sequence) followed by constant_term
+    #
+    # Returns:
+    #   the new solution status (see status())
+    def add_equation(self, equation, constant_term=None):
+        if constant_term is None:
+            coefficients, constant_term = equation.normal_vector.coordinates, equation.constant_term
+        else:
+            coefficients = equation.coordinates if isinstance(equation, Vector) else equation
+        if len(coefficients) != self.dimension:
+            raise Exception(self.ALL_EQUATIONS_MUST_BE_IN_SAME_DIM_MSG)
+
+        convert = self.backend.convert
+        row = [convert(a) for a in coefficients] + [convert(constant_term)]
+        self.equations.append(row)
+        self._insert(list(row))
+        return self.status()
+
+    # -----------------------------------------------------------------------------
+    # remove_equation(self, index):
+    #   Remove the equation added index-th (0-based, among those not removed).
+    #   A row of the RREF mixes all the equations that were reduced into it, so
+    #   the form is rebuilt from the remaining equations: this costs a full
+    #   elimination, O(m·rank·n).
+    #
+    # Returns:
+    #   the new solution status (see status())
+    def remove_equation(self, index):
+        del self.equations[index]
+        self.rows, self.pivots, self.inconsistent = [], [], 0
+        for row in self.equations:
+            self._insert(list(row))
+        return self.status()
+
+    def _insert(self, row):
+        self._parametrization = None
+        zero = self.backend.zero
+        is_near_zero = self.backend.is_near_zero
+        n = self.dimension
+
+        for pivot_row, col in zip(self.rows, self.pivots):     # reduce against the pivot rows
+            factor = row[col]
+            if factor != 0:
+                row[:] = [a - factor * b for a, b in zip(row, pivot_row)]
+                row[col] = zero
+
+        col = next((j for j in range(n) if not is_near_zero(row[j])), -1)
+        if col == -1:
+            if not is_near_zero(row[n]):
+                self.inconsistent += 1
+            return
+
+        pivot_term = row[col]
+        row[:] = [zero] * col + [a / pivot_term for a in row[col:]]
+        row[col] = self.backend.one
+
+        for other in self.rows:                                 # clear the new pivot column
+            factor = other[col]
+            if factor != 0:
+                other[:] = [a - factor * b for a, b in zip(other, row)]
+                other[col] = zero
+
+        position = bisect(self.pivots, col)
+        self.rows.insert(position, row)
+        self.pivots.insert(position, col)
+
+    @property
+    def rank(self):
+        return len(self.pivots)
+
+    # -----------------------------------------------------------------------------
+    # status(self):
+    #   The solution status of the system, without building its solution.
+    #
+    # Returns:
+    #   NO_SOLUTIONS_MSG, UNIQUE_SOLUTION_MSG or INF_SOLUTIONS_MSG
+    def status(self):
+        if self.inconsistent:
+            return self.NO_SOLUTIONS_MSG
+        if self.rank == self.dimension:
+            return self.UNIQUE_SOLUTION_MSG
+        return self.INF_SOLUTIONS_MSG
+
+    # -----------------------------------------------------------------------------
+    # solve_system(self):
+    #   Read the solution off the current reduced row echelon form, with no
+    #   elimination. The parametrization is cached until the next change.
+    #
+    # Returns:
+    #   solution: - a Parametrization object for the case where we have a unique
+    #               or infinite solution set
+    #             - NO_SOLUTIONS_MSG if the system is inconsistent
+    def solve_system(self):
+        if self.inconsistent:
+            return self.NO_SOLUTIONS_MSG
+        if self._parametrization is None:
+            self._parametrization = self.make_parametric()
+        return self._parametrization
+
+    def make_parametric(self):
+        zero, one = self.backend.zero, self.backend.one
+        n = self.dimension
+
+        base_point = [zero] * n
+        for row, col in zip(self.rows, self.pivots):
+            base_point[col] = row[-1]
+
+        dir_vectors = []
+        pivot_columns = set(self.pivots)
+        for free in range(n):
+            if free in pivot_columns:
+                continue
+            direction = [zero] * n
+            direction[free] = one
+            for row, col in zip(self.rows, self.pivots):
+                direction[col] = -row[free]
+            dir_vectors.append(Vector._from_coords(tuple(direction), self.backend))
+
+        return Parametrization(Vector._from_coords(tuple(base_point), self.backend), dir_vectors)
+
+    def __len__(self):
+        return len(self.equations)
+
+    def __str__(self):
+        ret = 'Incremental Linear System: {} equations, {} variables, rank {}: {}'.format(
+            len(self), self.dimension, self.rank, self.status())
+        for row, col in zip(self.rows, self.pivots):
+            ret += '\n  x_{} = {}'.format(col + 1, Parametrization.format_number(row[-1]))
+        return ret
+
+
+def test():
+    from plane import Plane
+    from hyperplane import Hyperplane
+
+    p1 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['0', '1', '0']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['1', '1', '-1']), constant_term='3')
+    p4 = Plane(normal_vector=Vector(['1', '0', '-2']), constant_term='2')
+
+    s = IncrementalLinearSystem(3)
+    for p in (p1, p2, p3, p4):
+        print(s.add_equation(p))
+        print(s.solve_system())
+    print(s)
+    print('matches LinearSystem:',
+          str(s.solve_system()) == str(LinearSystem([p1, p2, p3, p4]).solve_system()))
+
+    print(s.add_equation(['1', '0', '-2'], '3'))            # contradicts p4
+    print(s.solve_system())
+    print(s.remove_equation(4))
+    print(s.remove_equation(0))
+    print(s.solve_system())
+
+    # equations arriving one at a time in 6 variables
+    s = IncrementalLinearSystem(6)
+    statuses = []
+    for i in range(6):
+        coefficients = [(i * 5 + j * 3) % 7 - 3 for j in range(6)]
+        statuses.append((s.add_equation(Hyperplane(coefficients, i)), s.rank))
+    print(statuses)
+    print(s.solve_system())
+
+
+if __name__ == '__main__':
+    test()
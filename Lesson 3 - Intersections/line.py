@@ -1,5 +1,9 @@
+import math
+from array import array
 from decimal import Decimal, getcontext
 from vector import Vector
+from vector_batch import VectorBatch
+from numeric import backend_of
 
 getcontext().prec = 30
 
@@ -7,19 +11,28 @@ getcontext().prec = 30
 class Line(object):
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
+    CANONICAL_TOLERANCE = 1e-9
 
-    def __init__(self, normal_vector=None, constant_term=None):
+    UNIQUE = 0          # status codes of intersect_batch()
+    PARALLEL = 1
+    COINCIDENT = 2
+
+    def __init__(self, normal_vector=None, constant_term=None, backend=None):
         self.dimension = 2
 
         if not normal_vector:
             all_zeros = ['0']*self.dimension
-            normal_vector = Vector(all_zeros)
+            normal_vector = Vector(all_zeros, backend)
+        elif backend is not None:
+            normal_vector = normal_vector.to_backend(backend)
         self.normal_vector = normal_vector
+        self.backend = normal_vector.backend
 
         if not constant_term:
             constant_term = Decimal('0')
-        self.constant_term = Decimal(constant_term)
+        self.constant_term = self.backend.convert(constant_term)
 
+        self._canonical = None
         self.set_basepoint()
 
     def set_basepoint(self):
@@ -33,7 +46,7 @@ class Line(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            self.basepoint = Vector(basepoint_coords, self.backend)
 
         except Exception as e:
             if str(e) == Line.NO_NONZERO_ELTS_FOUND_MSG:
@@ -69,7 +82,7 @@ class Line(object):
         x = (D * k_1 - B * k_2) / denominator
         y = (A * k_2 - C * k_1) / denominator
 
-        return Vector([x, y])
+        return Vector([x, y], self.backend)
 
     def __str__(self):
 
@@ -117,27 +130,157 @@ class Line(object):
         return output
 
     def __eq__(self, other):
+        if not isinstance(other, Line):
+            return NotImplemented
 
         if not self.is_parallel(other):
             return False
 
-        basepoint_diff = other.basepoint - self.basepoint
+        try:    # an exception occurs if one of the lines has a zero normal vector
+            basepoint_diff = other.basepoint - self.basepoint
+        except TypeError:
+            if self.basepoint is None and other.basepoint is None:     # 0 = 0 everywhere, 0 = k nowhere
+                return self.backend.is_near_zero(self.constant_term) == other.backend.is_near_zero(other.constant_term)
+            return False
 
         return basepoint_diff.is_orthogonal(self.normal_vector)
 
+    # -----------------------------------------------------------------------------
+    # canonical_form(self, tolerance):
+    #   A hashable key identifying the line independently of how its equation is
+    #   scaled: the normal vector and constant term are divided by the magnitude of
+    #   the normal vector, the sign is fixed so that the first nonzero coefficient is
+    #   positive, and every value is snapped to a grid of spacing 'tolerance'.
+    #   Equations without a normal vector get one key for 0 = 0 and another for
+    #   0 = k, k nonzero. The key is computed in float64 and is only a grid
+    #   key for deduplicate(): two equations that == calls equal can fall on
+    #   either side of a grid boundary, and distinct ones closer than the grid
+    #   spacing share a key. == keeps the tolerance-based geometric comparison.
+    #
+    # Arguments:
+    #   self: a Line object
+    #   tolerance: spacing of the rounding grid (CANONICAL_TOLERANCE when None, in
+    #       which case the key is cached on the object)
+    #
+    # Returns:
+    #   tuple of integers
+    def canonical_form(self, tolerance=None):
+        if tolerance is None:
+            if self._canonical is None:
+                self._canonical = self.canonical_form(self.CANONICAL_TOLERANCE)
+            return self._canonical
+
+        if self.normal_vector.is_zero():    # 0 = 0 holds everywhere, 0 = k (k nonzero) nowhere
+            key = (0,) * self.dimension + (0 if self.backend.is_near_zero(self.constant_term) else 1,)
+        else:
+            mag = float(self.normal_vector.get_mag())
+            values = [float(x) / mag for x in self.normal_vector] + [float(self.constant_term) / mag]
+            key = [int(round(x / tolerance)) for x in values]
+
+            initial_index = next(i for i, x in enumerate(key) if x != 0)
+            if key[initial_index] < 0:
+                key = [-x for x in key]
+            key = tuple(key)
+
+        return key
+
+    # == is a tolerance test, which no rounding can match exactly: the hash only
+    # uses the dimension, so that equal lines always hash alike. deduplicate()
+    # groups on canonical_form() instead.
+    def __hash__(self):
+        return hash(self.dimension)
+
     @staticmethod
     def first_nonzero_index(iterable):
+        backend = backend_of(iterable)
         for k, item in enumerate(iterable):
-            if not MyDecimal(item).is_near_zero():
+            if not backend.is_near_zero(item):
                 return k
         raise Exception(Line.NO_NONZERO_ELTS_FOUND_MSG)
 
 
+# -----------------------------------------------------------------------------
+# deduplicate(lines, tolerance):
+#   Drop the equations describing a line already seen, in linear time, by
+#   grouping the lines on their canonical form instead of comparing every pair.
+#   The grouping is on a 1e-9 grid (see canonical_form()), not on ==.
+#
+# Arguments:
+#   lines: iterable of Line objects
+#   tolerance: spacing of the rounding grid of canonical_form(), None for the default
+#
+# Returns:
+#   list of the first occurrence of each distinct line, in input order
+def deduplicate(lines, tolerance=None):
+    seen = set()
+    unique = []
+    for line in lines:
+        key = line.canonical_form(tolerance)
+        if key not in seen:
+            seen.add(key)
+            unique.append(line)
+    return unique
+
+
 class MyDecimal(Decimal):
     def is_near_zero(self, eps=1e-10):
         return abs(self) < eps
 
 
+# -----------------------------------------------------------------------------
+# intersect_batch(normals_1, constants_1, normals_2, constants_2, epsilon):
+#   Intersect line i of the first set with line i of the second set, for every i,
+#   in one pass over float64 coefficients. No Line or Vector objects are built.
+#   For the lines A x + B y = k_1 and C x + D y = k_2 with det = A D - B C:
+#      - unique:     (x, y) = ((D k_1 - B k_2) / det, (A k_2 - C k_1) / det)
+#      - parallel:   det² < 2 epsilon |n_1|² |n_2|², the tolerance Vector.is_parallel()
+#                    applies to the normal vectors
+#      - coincident: parallel, and a point of the second line, k_2 n_2 / |n_2|²,
+#                    lies on the first line within epsilon (as in Line.__eq__)
+#
+# Arguments:
+#   normals_1, normals_2: VectorBatch of dimension 2, or flat sequences of the
+#       coefficients (A_0, B_0, A_1, B_1, ...)
+#   constants_1, constants_2: sequences of constant terms, one per line
+#   epsilon: tolerance of the parallel and coincident tests
+#
+# Returns:
+#   (points, status): a VectorBatch of intersection points (nan coordinates when
+#   the intersection is not a single point) and array('b') of status codes
+#   Line.UNIQUE, Line.PARALLEL or Line.COINCIDENT
+def intersect_batch(normals_1, constants_1, normals_2, constants_2, epsilon=1e-10):
+    n_1 = normals_1.data if isinstance(normals_1, VectorBatch) else normals_1
+    n_2 = normals_2.data if isinstance(normals_2, VectorBatch) else normals_2
+
+    if not (len(n_1) == len(n_2) == 2 * len(constants_1) == 2 * len(constants_2)):
+        raise Exception('Both sets must hold the same number of lines')
+
+    nan = math.nan
+    points = array('d')
+    status = array('b')
+    it_1, it_2 = iter(n_1), iter(n_2)
+
+    for A, B, C, D, k_1, k_2 in zip(it_1, it_1, it_2, it_2, constants_1, constants_2):
+        A, B, C, D, k_1, k_2 = float(A), float(B), float(C), float(D), float(k_1), float(k_2)
+        denominator = A * D - B * C
+        mag_sq_1 = A * A + B * B
+        mag_sq_2 = C * C + D * D
+
+        if denominator * denominator >= 2 * epsilon * mag_sq_1 * mag_sq_2 and denominator != 0:
+            points.extend(((D * k_1 - B * k_2) / denominator, (A * k_2 - C * k_1) / denominator))
+            status.append(Line.UNIQUE)
+            continue
+
+        points.extend((nan, nan))
+        if mag_sq_2 == 0:
+            on_first_line = k_2 == 0 and (mag_sq_1 != 0 or k_1 == 0)    # second 'line' is all or nothing
+        else:
+            on_first_line = abs((A * C + B * D) * k_2 / mag_sq_2 - k_1) < epsilon
+        status.append(Line.COINCIDENT if on_first_line else Line.PARALLEL)
+
+    return VectorBatch(points, 2), status
+
+
 def test():
     n_l_1 = Vector([1, 1])
     k_1 = 1
@@ -157,6 +300,17 @@ def test():
     print('\nIntersection of line 1 and line 2 is: ')
     print(l_1.get_intersection(l_2))
 
+    # distinct parallel lines whose canonical forms round to the same grid key
+    l_3 = Line(Vector(['1000000', '0']), '1')
+    l_4 = Line(Vector(['1000000', '0']), '1.0001')
+    print('\nDistinct parallel lines:', l_3 == l_4, l_3.get_intersection(l_4), l_3 == None,
+          len(deduplicate([l_3, l_4])))
+
+    points, status = intersect_batch([1, 1, 7.204, 3.182, 1, 1], [1, 8.68, 1],
+                                     [-3, -3, 8.172, 4.114, 2, 2], [-3, 9.883, 5])
+    print('\nBatch intersections (status 0: unique, 1: parallel, 2: coincident): ')
+    print(list(status), [str(round(p, 3)) for p in points.to_vectors()])
+
 
 if __name__ == '__main__':
     test()
@@ -1,8 +1,12 @@
 from decimal import Decimal, getcontext
 from copy import deepcopy
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 from vector import Vector
-from plane import Plane     #TODO: generalize this class to higher dimensions by creating a hyperplane class (lesson 3, part 25)
+from numeric import precision
+from plane import Plane, deduplicate as deduplicate_planes
+from hyperplane import Hyperplane
 
 getcontext().prec = 30
 
@@ -21,6 +25,8 @@ class LinearSystem(object):
 
             self.planes = planes
             self.dimension = d
+            self.backend = planes[0].backend
+            self.growth_factor = None           # set by compute_triangular_form() and solve_system()
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
@@ -39,19 +45,25 @@ class LinearSystem(object):
     #
     # Arguments:
     #   self: a LinearSystem object
+    #   prec: Decimal precision (digits) used for this call only, in this thread only
+    #       (see numeric.precision); None keeps the current precision
+    #   partial_pivoting: see compute_triangular_form()
     #
     # Returns:
     #   solution: - a Vector object (for unique solution)
     #             - String object (if no solution exists or infinitely many solutions)
-    def solve_system(self):
-        system = self.compute_rref()
-        fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()[:self.dimension]
+    def solve_system(self, prec=None, partial_pivoting=False):
+        with precision(prec):
+            system = self.compute_rref(partial_pivoting)
+            self.growth_factor = system.growth_factor
+            fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()[:self.dimension]
 
-        for row_i, pivot_i in enumerate(fnzt_indices):               # if FNZT for any row is -1 (all terms 0) and where
-            if pivot_i == -1 and system[row_i].constant_term != 0:   # constant term k is non-zero, the system has no
-                return system.NO_SOLUTIONS_MSG                       # solution
+            for row_i, pivot_i in enumerate(fnzt_indices):          # if FNZT for any row is -1 (all terms 0) and
+                k = system[row_i].constant_term                     # where constant term k is non-zero, the system
+                if pivot_i == -1 and not self.backend.is_near_zero(k):  # has no solution
+                    return system.NO_SOLUTIONS_MSG
 
-        return system.make_parametric()
+            return system.make_parametric()
 
     # -----------------------------------------------------------------------------
     # make_parametric(self):
@@ -81,9 +93,9 @@ class LinearSystem(object):
                         dir_vectors[-1][row_j] = self[row_j].normal_vector[row_i]
 
                 dir_vectors[-1][row_i] = 1
-                dir_vectors[-1] = Vector(dir_vectors[-1])
+                dir_vectors[-1] = Vector(dir_vectors[-1], self.backend)
 
-        return Parametrization(Vector(base_point), dir_vectors)
+        return Parametrization(Vector(base_point, self.backend), dir_vectors)
 
     # -----------------------------------------------------------------------------
     # compute_rref(self):
@@ -97,11 +109,12 @@ class LinearSystem(object):
     #                  --                  --
     # Arguments:
     #   self: a LinearSystem object
+    #   partial_pivoting: see compute_triangular_form()
     #
     # Returns:
     #   LinearSystem object
-    def compute_rref(self):
-        tf = self.compute_triangular_form()
+    def compute_rref(self, partial_pivoting=False):
+        tf = self.compute_triangular_form(partial_pivoting)
         fnzt_indices = tf.indices_of_first_nonzero_terms_in_each_row()
 
         for row_i, pivot_i in enumerate(fnzt_indices):      # 'row_i' indexes each row in the system of eq. referenced
@@ -138,34 +151,64 @@ class LinearSystem(object):
     #                  |    :         :     |
     #                  | 0  0  0  ... x = x |
     #                  --                  --
+    #   The first nonzero term (FNZT) index of every row is computed once and then
+    #   kept up to date: a swap exchanges two entries, and a row operation only
+    #   changes the index of the row it modifies, which is rescanned from the
+    #   eliminated term onwards. Elimination is then O(n³) instead of rescanning
+    #   every row for every pair of rows.
+    #
     # Arguments:
     #   self: a LinearSystem object
+    #   partial_pivoting: among the rows sharing the smallest FNZT index, use the one
+    #       with the largest pivot term instead of the first one, which keeps the
+    #       rounding errors of the float64 backend small (see also
+    #       elimination.AugmentedMatrix for complete and rook pivoting)
+    #
+    #   As in elimination.AugmentedMatrix, the growth factor (largest |a_ij| over
+    #   all the intermediate coefficients divided by the largest original |a_ij|)
+    #   is recorded in the growth_factor attribute of the returned system, and by
+    #   solve_system() in that of the solved one.
     #
     # Returns:
     #   LinearSystem object
-    # TODO: re-factor this method so it's easier to read
-    def compute_triangular_form(self):
+    def compute_triangular_form(self, partial_pivoting=False):
         system = deepcopy(self)
         rank = len(system)
+        fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()
+        initial_max = max([abs(x) for p in system.planes for x in p.normal_vector])
+        largest = initial_max
 
-        for row_i in range(rank-1):
-            fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()  # find next row below row_i with the
-            lower_row_fnzt_indices = fnzt_indices[row_i+1:]                     # lowest index containing first non-zero
-            smallest_fnzt_index = min(lower_row_fnzt_indices)                   # term (FNZT)
+        def sort_key(pivot_i):                                  # rows of zeros (FNZT index -1) go last
+            return system.dimension if pivot_i == -1 else pivot_i
 
-            if smallest_fnzt_index < fnzt_indices[row_i]:       # swap row_i with a row that has the smallest FNZT index
-                row_to_swap = lower_row_fnzt_indices.index(smallest_fnzt_index) + row_i + 1
+        for row_i in range(rank-1):
+            lower_row_fnzt_indices = fnzt_indices[row_i+1:]                     # find next row below row_i with the
+            smallest_fnzt_index = min(lower_row_fnzt_indices, key=sort_key)     # lowest index containing first non-
+                                                                                # zero term (FNZT)
+            if sort_key(smallest_fnzt_index) < sort_key(fnzt_indices[row_i]):   # swap row_i with a row that has the
+                row_to_swap = lower_row_fnzt_indices.index(smallest_fnzt_index) + row_i + 1     # smallest FNZT index
                 system.swap_rows(row_i, row_to_swap)
+                fnzt_indices[row_i], fnzt_indices[row_to_swap] = fnzt_indices[row_to_swap], fnzt_indices[row_i]
 
-            for row_j in range(row_i+1, rank):
-                fnzt_indices = system.indices_of_first_nonzero_terms_in_each_row()  # update the FNZT indices
+            pivot_i = fnzt_indices[row_i]
+            if pivot_i == -1:                                   # only rows of zeros are left
+                break
 
-                if fnzt_indices[row_i] == fnzt_indices[row_j]:                      # if the FNZT index of the row_j
-                    numerator = system[row_j].normal_vector[fnzt_indices[row_j]]    # matches the FNZT index of the
-                    denominator = system[row_i].normal_vector[fnzt_indices[row_i]]  # current row then multiply coef.
-                    beta = - numerator / denominator                                # with row_i, add that to row_j and
-                    system.add_multiple_times_row_to_row(beta, row_i, row_j)        # replace row_j with result
+            if partial_pivoting:
+                row_to_swap = max((j for j in range(row_i, rank) if fnzt_indices[j] == pivot_i),
+                                  key=lambda j: abs(system[j].normal_vector[pivot_i]))
+                system.swap_rows(row_i, row_to_swap)            # rows with the same FNZT index: no index update
 
+            for row_j in range(row_i+1, rank):
+                if fnzt_indices[row_j] == pivot_i:                              # if the FNZT index of the row_j
+                    numerator = system[row_j].normal_vector[pivot_i]            # matches the FNZT index of the
+                    denominator = system[row_i].normal_vector[pivot_i]          # current row then multiply coef.
+                    beta = - numerator / denominator                            # with row_i, add that to row_j and
+                    system.add_multiple_times_row_to_row(beta, row_i, row_j)    # replace row_j with result
+                    fnzt_indices[row_j] = system.index_of_first_nonzero_term(row_j, pivot_i + 1)
+                    largest = max(largest, max([abs(x) for x in system[row_j].normal_vector]))
+
+        system.growth_factor = float(largest / initial_max) if initial_max else 1.0
         return system
 
     # -----------------------------------------------------------------------------
@@ -184,7 +227,8 @@ class LinearSystem(object):
     # -----------------------------------------------------------------------------
     # multiply_coefficient_and_row(self, coefficient, row):
     #   For a given Plane within the LinearSystem multiply its normal vector and
-    #   constant term with the coefficient.
+    #   constant term with the coefficient. The new row has the type of the old one
+    #   (Plane, Line or Hyperplane).
     #
     # Arguments:
     #   self: a LinearSystem object
@@ -194,9 +238,10 @@ class LinearSystem(object):
     # Returns:
     #   None
     def multiply_coefficient_and_row(self, coefficient, row):
+        coefficient = self.backend.convert(coefficient)
         normal_vector = self[row].normal_vector.scalar_mult(coefficient)
         coefficient = coefficient * self[row].constant_term
-        self[row] = Plane(normal_vector, coefficient)
+        self[row] = type(self[row])(normal_vector, coefficient)
 
     # -----------------------------------------------------------------------------
     # add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
@@ -213,27 +258,60 @@ class LinearSystem(object):
     # Returns:
     #   None
     def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
-        normal_vector = self[row_to_add].normal_vector.scalar_mult(coefficient) + \
-                        self[row_to_be_added_to].normal_vector
-        constant_term = coefficient * self[row_to_add].constant_term + self[row_to_be_added_to].constant_term
-        self[row_to_be_added_to] = Plane(normal_vector, constant_term)
+        coefficient = self.backend.convert(coefficient)
+        p, q = self[row_to_add], self[row_to_be_added_to]
+        normal_vector = Vector._from_coords(tuple([coefficient * a + b for a, b in             # one pass, no
+                                                   zip(p.normal_vector, q.normal_vector)]),   # intermediate Vector
+                                            self.backend)
+        constant_term = coefficient * p.constant_term + q.constant_term
+        self[row_to_be_added_to] = type(q)(normal_vector, constant_term)
 
     def indices_of_first_nonzero_terms_in_each_row(self):
-        num_equations = len(self)
-        num_variables = self.dimension
+        return [self.index_of_first_nonzero_term(i) for i in range(len(self))]
 
-        indices = [-1] * num_equations
+    # -----------------------------------------------------------------------------
+    # index_of_first_nonzero_term(self, row, start):
+    #   Index of the first nonzero term of one row, looking from 'start' on (the
+    #   terms before it are known to be zero).
+    #
+    # Returns:
+    #   Integer, -1 for a row of zeros
+    def index_of_first_nonzero_term(self, row, start=0):
+        n = self[row].normal_vector
+        is_near_zero = self.backend.is_near_zero
+        for k in range(start, self.dimension):
+            if not is_near_zero(n[k]):
+                return k
+        return -1
 
-        for i, p in enumerate(self.planes):
-            try:
-                indices[i] = p.first_nonzero_index(p.normal_vector)
-            except Exception as e:
-                if str(e) == Plane.NO_NONZERO_ELTS_FOUND_MSG:
-                    continue
-                else:
-                    raise e
+    # -----------------------------------------------------------------------------
+    # deduplicate(self, tolerance):
+    #   Drop the equations that describe a plane already present in the system (see
+    #   Plane.canonical_form), in linear time. Useful before compute_rref() on large
+    #   systems with many redundant rows.
+    #
+    # Arguments:
+    #   self: a LinearSystem object
+    #   tolerance: spacing of the rounding grid of Plane.canonical_form()
+    #
+    # Returns:
+    #   LinearSystem object
+    def deduplicate(self, tolerance=None):
+        return LinearSystem(deduplicate_planes(self.planes, tolerance))
 
-        return indices
+    # -----------------------------------------------------------------------------
+    # to_backend(self, backend):
+    #   Express every equation of the system with another numeric backend so that
+    #   elimination runs with that backend's arithmetic (see numeric.py).
+    #
+    # Arguments:
+    #   self: a LinearSystem object
+    #   backend: a backend object or backend name ('decimal', 'float64', 'fraction')
+    #
+    # Returns:
+    #   LinearSystem object
+    def to_backend(self, backend):
+        return LinearSystem([type(p)(p.normal_vector, p.constant_term, backend=backend) for p in self.planes])
 
     def __len__(self):
         return len(self.planes)
@@ -285,13 +363,50 @@ class Parametrization(object):
         output = ''
         for coord in range(self.dimension):
             output += 'x_{} = {}'.format(coord + 1,
-                                          round(self.basepoint[coord], 3))
+                                          self.format_number(self.basepoint[coord]))
             for free_var, vector in enumerate(self.direction_vectors):
-                output += ' + {} t_{}'.format(round(vector[coord], 3),
+                output += ' + {} t_{}'.format(self.format_number(vector[coord]),
                                              free_var + 1)
             output += '\n'
         return output
 
+    @staticmethod
+    def format_number(x, num_decimal_places=3):
+        if isinstance(x, Decimal):
+            return round(x, num_decimal_places)
+        return '{:.{prec}f}'.format(float(x), prec=num_decimal_places)     # float and Fraction coordinates
+
+
+# -----------------------------------------------------------------------------
+# solve_systems(systems, max_workers, prec, processes):
+#   Solve many independent systems concurrently. Each solve runs inside its own
+#   Decimal context (see numeric.precision), so results do not depend on which
+#   worker thread picked the system up.
+#
+#   Decimal arithmetic holds the GIL, so threads give correct but mostly
+#   interleaved execution; processes=True runs the solves in worker processes for
+#   actual parallelism, at the cost of pickling each system and its solution.
+#
+# Arguments:
+#   systems: iterable of LinearSystem objects
+#   max_workers: size of the pool (executor default when None)
+#   prec: Decimal precision for every solve, None for numeric.PRECISION
+#   processes: use a process pool instead of a thread pool
+#
+# Returns:
+#   list of solutions (Parametrization objects or message strings), in the order
+#   of 'systems'
+def solve_systems(systems, max_workers=None, prec=None, processes=False):
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    systems = list(systems)
+
+    with executor_class(max_workers) as executor:
+        return list(executor.map(_solve_system, systems, [prec] * len(systems)))
+
+
+def _solve_system(system, prec):
+    return system.solve_system(prec)
+
 
 def test():
     p1 = Plane(normal_vector=Vector(['5.862', '1.178', '-10.366']), constant_term='-8.15')
@@ -334,6 +449,33 @@ def test():
     p2 = Plane(normal_vector=Vector(['0', '1', '1']), constant_term='2')
     s = LinearSystem([p1, p2])
     print(s.solve_system())
+
+    h1 = Hyperplane(['1', '1', '0', '0', '2'], '4')
+    h2 = Hyperplane(['0', '1', '-1', '0', '0'], '1')
+    h3 = Hyperplane(['0', '0', '1', '1', '-1'], '0')
+    h4 = Hyperplane(['2', '0', '0', '1', '0'], '3')
+    h5 = Hyperplane(['0', '0', '0', '1', '1'], '2')
+    s = LinearSystem([h1, h2, h3, h4, h5])
+    print(s.solve_system())
+
+    # 0 = 0 and 0 = 5 are different equations: deduplicate() must keep the contradiction
+    p1 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['0', '0', '0']), constant_term='0')
+    p3 = Plane(normal_vector=Vector(['0', '0', '0']), constant_term='5')
+    p4 = Plane(normal_vector=Vector(['-2', '-2', '-2']), constant_term='-2')
+    s = LinearSystem([p1, p2, p3, p4])
+    print(len(s.deduplicate()), s.deduplicate().solve_system(), p2 == p3, p1 == p4, len({p1, p2, p3, p4}))
+
+    # growth factor of the elimination: a tiny first pivot inflates the second row
+    # unless partial pivoting picks the larger one
+    p1 = Plane(normal_vector=Vector(['0.0001', '1', '0']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['1', '1', '0']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['0', '0', '1']), constant_term='3')
+    s = LinearSystem([p1, p2, p3])
+    for partial_pivoting in (False, True):
+        s.solve_system(partial_pivoting=partial_pivoting)
+        print(partial_pivoting, round(s.growth_factor, 4),
+              round(s.compute_triangular_form(partial_pivoting).growth_factor, 4))
     #
     # print(s.indices_of_first_nonzero_terms_in_each_row())
     # print('{},{},{},{}'.format(s[0],s[1],s[2],s[3]))
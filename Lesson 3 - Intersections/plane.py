@@ -1,25 +1,41 @@
+from array import array
 from decimal import Decimal, getcontext
+from itertools import chain
+from operator import add
 from vector import Vector
+from vector_batch import VectorBatch
+from numeric import backend_of
 
 getcontext().prec = 30
 
+CHUNK_SIZE = 16384      # points evaluated at a time by PlaneSet
+
 
 class Plane(object):
 
     NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
+    CANONICAL_TOLERANCE = 1e-9
+
+    POSITIVE = 1        # side labels of classify_points(), relative to the normal vector
+    ON_PLANE = 0
+    NEGATIVE = -1
 
-    def __init__(self, normal_vector=None, constant_term=None):
+    def __init__(self, normal_vector=None, constant_term=None, backend=None):
         self.dimension = 3
 
         if not normal_vector:
             all_zeros = ['0']*self.dimension
-            normal_vector = Vector(all_zeros)
+            normal_vector = Vector(all_zeros, backend)
+        elif backend is not None:
+            normal_vector = normal_vector.to_backend(backend)
         self.normal_vector = normal_vector
+        self.backend = normal_vector.backend
 
         if not constant_term:
             constant_term = Decimal('0')
-        self.constant_term = Decimal(constant_term)
+        self.constant_term = self.backend.convert(constant_term)
 
+        self._canonical = None
         self.set_basepoint()
 
     def set_basepoint(self):
@@ -32,7 +48,7 @@ class Plane(object):
             initial_coefficient = n[initial_index]
 
             basepoint_coords[initial_index] = c/initial_coefficient
-            self.basepoint = Vector(basepoint_coords)
+            self.basepoint = Vector(basepoint_coords, self.backend)
 
         except Exception as e:
             if str(e) == Plane.NO_NONZERO_ELTS_FOUND_MSG:
@@ -100,6 +116,8 @@ class Plane(object):
         return output
 
     def __eq__(self, other):
+        if not isinstance(other, Plane):
+            return NotImplemented
 
         if not self.is_parallel(other):
             return False
@@ -107,20 +125,228 @@ class Plane(object):
         try:    # an exception occurs if one of the planes has a zero normal vector
             basepoint_diff = other.basepoint - self.basepoint
         except TypeError:
-            if not other.basepoint and not self.basepoint:
-                return True
+            if self.basepoint is None and other.basepoint is None:     # 0 = 0 everywhere, 0 = k nowhere
+                return self.backend.is_near_zero(self.constant_term) == other.backend.is_near_zero(other.constant_term)
             return False
 
         return basepoint_diff.is_orthogonal(self.normal_vector)
 
+    # -----------------------------------------------------------------------------
+    # canonical_form(self, tolerance):
+    #   A hashable key identifying the plane independently of how its equation is
+    #   scaled: the normal vector and constant term are divided by the magnitude of
+    #   the normal vector, the sign is fixed so that the first nonzero coefficient is
+    #   positive, and every value is snapped to a grid of spacing 'tolerance'.
+    #   Equations without a normal vector get one key for 0 = 0 and another for
+    #   0 = k, k nonzero. The key is computed in float64 and is only a grid
+    #   key for deduplicate(): two equations that == calls equal can fall on
+    #   either side of a grid boundary, and distinct ones closer than the grid
+    #   spacing share a key. == keeps the tolerance-based geometric comparison.
+    #
+    # Arguments:
+    #   self: a Plane object
+    #   tolerance: spacing of the rounding grid (CANONICAL_TOLERANCE when None, in
+    #       which case the key is cached on the object)
+    #
+    # Returns:
+    #   tuple of integers
+    def canonical_form(self, tolerance=None):
+        if tolerance is None:
+            if self._canonical is None:
+                self._canonical = self.canonical_form(self.CANONICAL_TOLERANCE)
+            return self._canonical
+
+        if self.normal_vector.is_zero():    # 0 = 0 holds everywhere, 0 = k (k nonzero) nowhere
+            key = (0,) * self.dimension + (0 if self.backend.is_near_zero(self.constant_term) else 1,)
+        else:
+            mag = float(self.normal_vector.get_mag())
+            values = [float(x) / mag for x in self.normal_vector] + [float(self.constant_term) / mag]
+            key = [int(round(x / tolerance)) for x in values]
+
+            initial_index = next(i for i, x in enumerate(key) if x != 0)
+            if key[initial_index] < 0:
+                key = [-x for x in key]
+            key = tuple(key)
+
+        return key
+
+    # == is a tolerance test, which no rounding can match exactly: the hash only
+    # uses the dimension, so that equal planes always hash alike. deduplicate()
+    # groups on canonical_form() instead.
+    def __hash__(self):
+        return hash(self.dimension)
+
+    # -----------------------------------------------------------------------------
+    # signed_distances(self, points, chunk_size), classify_points(self, points,
+    # tolerance, chunk_size):
+    #   Single-plane shortcuts for PlaneSet.signed_distances() / PlaneSet.classify().
+    #
+    # Returns:
+    #   array('d') of signed distances, and array('b') of side labels for
+    #   classify_points(), one value per point
+    def signed_distances(self, points, chunk_size=CHUNK_SIZE):
+        return PlaneSet([self]).signed_distances(points, chunk_size).data
+
+    def classify_points(self, points, tolerance=1e-10, chunk_size=CHUNK_SIZE):
+        distances, labels = PlaneSet([self]).classify(points, tolerance, chunk_size)
+        return distances.data, labels
+
     @staticmethod
     def first_nonzero_index(iterable):
+        backend = backend_of(iterable)
         for k, item in enumerate(iterable):
-            if not MyDecimal(item).is_near_zero():
+            if not backend.is_near_zero(item):
                 return k
         raise Exception(Plane.NO_NONZERO_ELTS_FOUND_MSG)
 
 
+# -----------------------------------------------------------------------------
+# deduplicate(planes, tolerance):
+#   Drop the equations describing a plane already seen, in linear time, by
+#   grouping the planes on their canonical form instead of comparing every pair.
+#   The grouping is on a 1e-9 grid (see canonical_form()), not on ==.
+#
+# Arguments:
+#   planes: iterable of Plane objects
+#   tolerance: spacing of the rounding grid of canonical_form(), None for the default
+#
+# Returns:
+#   list of the first occurrence of each distinct plane, in input order
+def deduplicate(planes, tolerance=None):
+    seen = set()
+    unique = []
+    for p in planes:
+        key = p.canonical_form(tolerance)
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
+
+
+class PlaneSet(object):
+
+    ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG = 'All planes in the set should live in the same dimension'
+
+    # -----------------------------------------------------------------------------
+    # PlaneSet(planes):
+    #   A fixed set of planes against which many points are evaluated. The unit
+    #   normal u_j = n_j / |n_j| and offset d_j = k_j / |n_j| of every plane are
+    #   computed once, so the signed distance of a point x to plane j is u_j • x - d_j:
+    #   positive on the side the normal vector points to, negative on the other.
+    #
+    #   Points are processed in chunks. Within a chunk each coordinate axis is
+    #   sliced out of the VectorBatch buffer once and combined for all the points
+    #   at a time, so no Vector (or Decimal) is created per point.
+    #
+    # Arguments:
+    #   planes: nonempty list of Plane (or Hyperplane) objects of the same dimension
+    def __init__(self, planes):
+        self.planes = planes
+        self.dimension = planes[0].dimension
+        self.unit_normals = []
+        self.offsets = []
+
+        for p in planes:
+            if p.dimension != self.dimension:
+                raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+            if p.normal_vector.is_zero():       # '0 = k' has no sides to classify points by
+                raise Exception(Plane.NO_NONZERO_ELTS_FOUND_MSG)
+
+            mag = p.normal_vector.get_mag()
+            self.unit_normals.append([float(x) for x in p.normal_vector.normalize()])
+            self.offsets.append(float(p.constant_term / mag))
+
+    # -----------------------------------------------------------------------------
+    # chunks(self, points, chunk_size, tolerance):
+    #   Evaluate the points chunk by chunk, so that memory stays bounded by
+    #   chunk_size * len(planes) however many points there are.
+    #
+    # Arguments:
+    #   points: a VectorBatch, a list of Vector objects, or an iterable of
+    #       VectorBatch chunks (e.g. VectorStore.chunks())
+    #   chunk_size: number of points evaluated at a time
+    #   tolerance: distance under which a point counts as lying on a plane, None to
+    #       skip the side labels
+    #
+    # Returns:
+    #   a generator of (distances, labels): a VectorBatch whose row i holds the
+    #   signed distances of point i of the chunk to every plane, and array('b') of
+    #   side labels laid out the same way (None when tolerance is None)
+    def chunks(self, points, chunk_size=CHUNK_SIZE, tolerance=None):
+        for batch in self._point_batches(points, chunk_size):
+            distances = self._distances(batch)
+            labels = None
+            if tolerance is not None:
+                labels = array('b', [(x > tolerance) - (x < -tolerance) for x in distances])
+            yield VectorBatch(distances, len(self.planes)), labels
+
+    # -----------------------------------------------------------------------------
+    # signed_distances(self, points, chunk_size), classify(self, points,
+    # tolerance, chunk_size):
+    #   Evaluate every point against every plane. classify() also labels each
+    #   (point, plane) pair Plane.POSITIVE, Plane.NEGATIVE or Plane.ON_PLANE (when
+    #   |distance| <= tolerance).
+    #
+    # Returns:
+    #   a VectorBatch of dimension len(planes), row i holding the distances of point
+    #   i; for classify() also array('b') of labels in the same row-major layout
+    def signed_distances(self, points, chunk_size=CHUNK_SIZE):
+        data = array('d')
+        for distances, _ in self.chunks(points, chunk_size):
+            data.extend(distances.data)
+        return VectorBatch(data, len(self.planes))
+
+    def classify(self, points, tolerance=1e-10, chunk_size=CHUNK_SIZE):
+        data, labels = array('d'), array('b')
+        for distances, chunk_labels in self.chunks(points, chunk_size, tolerance):
+            data.extend(distances.data)
+            labels.extend(chunk_labels)
+        return VectorBatch(data, len(self.planes)), labels
+
+    def _point_batches(self, points, chunk_size):
+        if isinstance(points, VectorBatch):
+            batches = [points]
+        else:
+            points = iter(points)
+            first = next(points, None)
+            if first is None:
+                return
+            if isinstance(first, VectorBatch):          # already chunked, read lazily
+                batches = chain([first], points)
+            else:
+                batches = [VectorBatch.from_vectors(chain([first], points))]
+
+        for batch in batches:
+            for start in range(0, batch.size, chunk_size):
+                yield self._slice(batch, start, chunk_size)
+
+    def _slice(self, batch, start, chunk_size):
+        if batch.dimension != self.dimension:
+            raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        d = batch.dimension
+        return VectorBatch(batch.data[start * d:(start + chunk_size) * d], d)
+
+    def _distances(self, batch):
+        d = batch.dimension
+        axes = [batch.data[i::d] for i in range(d)]        # one contiguous array per coordinate
+        out = array('d', bytes(8 * batch.size * len(self.planes)))
+
+        for j, (u, offset) in enumerate(zip(self.unit_normals, self.offsets)):
+            column = [-offset] * batch.size
+            for axis, a in zip(axes, u):
+                if a != 0.0:
+                    column = map(add, column, map(a.__mul__, axis))
+            out[j::len(self.planes)] = array('d', column)
+
+        return out
+
+    def __len__(self):
+        return len(self.planes)
+
+    def __str__(self):
+        return 'PlaneSet: {} planes in dimension {}'.format(len(self.planes), self.dimension)
+
+
 class MyDecimal(Decimal):
     def is_near_zero(self, eps=1e-10):
         return abs(self) < eps
@@ -141,6 +367,24 @@ def test():
 
     print('\nLine 1 is equal to line 2: ')
     print(p_1 == p_2)
+
+    # precision is per call: a plane compared under precision(3) first
+    from numeric import precision
+    p_3 = Plane(Vector(['1', '1', '1']), 1)
+    p_4 = Plane(Vector(['1', '1', '1.0001']), 1)
+    with precision(3):
+        print('\nAt 3 digits, nearly parallel planes are parallel:', p_3.is_parallel(p_4))
+    print('At the default precision:', p_3.is_parallel(p_4), p_3.normal_vector.get_mag())
+
+    planes = PlaneSet([Plane(Vector([0, 0, 1]), 1), Plane(Vector([1, 1, 1]), 1), p_2])
+    points = [Vector([0, 0, 1]), Vector([1, 2, 3]), Vector([-1, -1, 0.5])]
+    distances, labels = planes.classify(points, chunk_size=2)
+    print('\n{}, signed distances and sides of 3 points:'.format(planes))
+    for row, i in zip(distances.rows(), range(0, len(labels), len(planes))):
+        print([round(x, 3) for x in row], labels[i:i + len(planes)].tolist())
+    print('matches dot products:', all(
+        abs(d - float((p.normal_vector.dot_product(x) - p.constant_term) / p.normal_vector.get_mag())) < 1e-12
+        for row, x in zip(distances.rows(), points) for d, p in zip(row, planes.planes)))
     #
     # print('\nIntersection of line 1 and line 2 is: ')
     # print(l_1.get_intersection(l_2))
@@ -0,0 +1,343 @@
+from decimal import getcontext
+
+from vector import Vector
+from sparse_vector import SparseVector
+from numeric import precision
+from linsys import LinearSystem, Parametrization
+
+getcontext().prec = 30
+
+
+class SparseLinearSystem(object):
+
+    ALL_EQUATIONS_MUST_BE_IN_SAME_DIM_MSG = 'All equations in the system should live in the same dimension'
+    ONE_CONSTANT_TERM_PER_EQUATION_MSG = 'There must be one constant term per equation'
+    UNKNOWN_ORDERING_MSG = 'Unknown pivot ordering'
+
+    MARKOWITZ = 'markowitz'     # pivot orderings
+    NATURAL = 'natural'
+
+    # -----------------------------------------------------------------------------
+    # SparseLinearSystem(normal_vectors, constant_terms):
+    #   A system of linear equations storing only the nonzero coefficients of each
+    #   equation (a SparseVector per row), for large systems with few variables
+    #   per equation.
+    #
+    # Arguments:
+    #   normal_vectors: list of SparseVector objects of the same dimension
+    #   constant_terms: list of the constant terms, one per equation
+    def __init__(self, normal_vectors, constant_terms):
+        if len(normal_vectors) != len(constant_terms):
+            raise Exception(self.ONE_CONSTANT_TERM_PER_EQUATION_MSG)
+
+        self.dimension = normal_vectors[0].dimension
+        self.backend = normal_vectors[0].backend
+        for v in normal_vectors:
+            if v.dimension != self.dimension:
+                raise Exception(self.ALL_EQUATIONS_MUST_BE_IN_SAME_DIM_MSG)
+
+        self.normal_vectors = [v.to_backend(self.backend) for v in normal_vectors]
+        self.constant_terms = [self.backend.convert(k) for k in constant_terms]
+
+        self.nonzeros = sum(v.nnz() for v in self.normal_vectors)
+        self.fill_in = None
+        self.factor_nonzeros = None
+        self.rank = None
+
+    @classmethod
+    def from_system(cls, system):
+        return cls([SparseVector.from_dense(p.normal_vector) for p in system.planes],
+                   [p.constant_term for p in system.planes])
+
+    # -----------------------------------------------------------------------------
+    # solve_system(self, prec, ordering, threshold):
+    #   Solve the system by sparse Gaussian elimination. Rows are dicts of their
+    #   nonzero coefficients and every column keeps the set of rows it appears in,
+    #   so a row operation only touches the nonzeros of the pivot row.
+    #
+    #   Eliminating with pivot a_rc creates up to (r - 1)(c - 1) new nonzeros
+    #   ("fill-in"), r and c being the number of nonzeros in its row and column.
+    #   The MARKOWITZ ordering picks at each step a pivot minimizing that product,
+    #   searching the rows and columns with fewest nonzeros first, among the
+    #   entries with |a_rc| >= threshold * max |column c| (threshold pivoting,
+    #   which bounds the growth of rounding errors). NATURAL eliminates the
+    #   variables in order, with the largest entry of each column as pivot.
+    #
+    #   Afterwards the attributes fill_in (nonzeros created), factor_nonzeros
+    #   (nonzeros of the pivot rows, used for back substitution) and rank report
+    #   the cost of the elimination.
+    #
+    # Arguments:
+    #   self: a SparseLinearSystem object
+    #   prec: Decimal precision (digits) used for this call only (see numeric.precision)
+    #   ordering: SparseLinearSystem.MARKOWITZ or SparseLinearSystem.NATURAL
+    #   threshold: in (0, 1], how small a pivot may be relative to its column
+    #
+    # Returns:
+    #   solution: - a Parametrization object for a unique or infinite solution set
+    #             - LinearSystem.NO_SOLUTIONS_MSG if the system is inconsistent
+    def solve_system(self, prec=None, ordering=MARKOWITZ, threshold=0.1):
+        if ordering not in (self.MARKOWITZ, self.NATURAL):
+            raise Exception(self.UNKNOWN_ORDERING_MSG)
+
+        with precision(prec):
+            elimination = _SparseElimination(self, threshold)
+            if ordering == self.MARKOWITZ:
+                elimination.run(elimination.markowitz_pivot)
+            else:
+                elimination.run_natural()
+
+            self.fill_in = elimination.fill_in
+            self.factor_nonzeros = elimination.factor_nonzeros
+            self.rank = len(elimination.pivots)
+
+            if not elimination.is_consistent():
+                return LinearSystem.NO_SOLUTIONS_MSG
+
+            return elimination.make_parametric()
+
+    def __len__(self):
+        return len(self.normal_vectors)
+
+    def __str__(self):
+        ret = 'Sparse Linear System: {} equations, {} variables, {} nonzeros'.format(
+            len(self), self.dimension, self.nonzeros)
+        if self.fill_in is not None:
+            ret += '\n  rank {}, fill-in {}, factor nonzeros {}'.format(self.rank, self.fill_in, self.factor_nonzeros)
+        return ret
+
+
+class _SparseElimination(object):
+
+    # working state of SparseLinearSystem.solve_system()
+    def __init__(self, system, threshold):
+        self.backend = system.backend
+        self.dimension = system.dimension
+        self.threshold = system.backend.convert(threshold)
+        is_near_zero = self.backend.is_near_zero       # near-zero coefficients are zeros, as in LinearSystem
+        self.rows = [{j: a for j, a in v.entries.items() if not is_near_zero(a)} for v in system.normal_vectors]
+        self.constants = list(system.constant_terms)
+
+        self.columns = {}                               # column -> set of the active rows containing it
+        for r, row in enumerate(self.rows):
+            for c in row:
+                self.columns.setdefault(c, set()).add(r)
+
+        self.row_buckets = {}                           # number of nonzeros -> set of active rows / columns
+        self.column_buckets = {}
+        self.row_counts = {}
+        self.column_counts = {}
+        for r, row in enumerate(self.rows):
+            _rebucket(self.row_buckets, self.row_counts, r, len(row))
+        for c, rows in self.columns.items():
+            _rebucket(self.column_buckets, self.column_counts, c, len(rows))
+
+        self.pivots = []
+        self.fill_in = 0
+        self.factor_nonzeros = 0
+
+    def run(self, choose_pivot):
+        while self.columns:
+            self.eliminate(*choose_pivot())
+
+    def run_natural(self):
+        for c in range(self.dimension):
+            rows = self.columns.get(c)
+            if rows:
+                p = max(rows, key=lambda r: abs(self.rows[r][c]))
+                if not self.backend.is_near_zero(self.rows[p][c]):
+                    self.eliminate(p, c)
+
+    # -----------------------------------------------------------------------------
+    # markowitz_pivot(self):
+    #   Rows and columns are examined by increasing number of nonzeros k. An entry
+    #   in a row or column of count k costs at least (k - 1)², so the search stops
+    #   at the first candidate reaching that bound, or once the best cost found is
+    #   below k², the least cost of the entries not examined yet.
+    def markowitz_pivot(self):
+        rows, columns = self.rows, self.columns
+        best, best_cost = None, None
+        k = 1
+
+        while True:
+            for r in self.row_buckets.get(k, ()):
+                for c in rows[r]:
+                    cost = (k - 1) * (len(columns[c]) - 1)
+                    if (best_cost is None or cost < best_cost) and self.is_stable(r, c):
+                        best, best_cost = (r, c), cost
+                        if cost == (k - 1) ** 2:
+                            return best
+
+            for c in self.column_buckets.get(k, ()):
+                for r in columns[c]:
+                    cost = (len(rows[r]) - 1) * (k - 1)
+                    if (best_cost is None or cost < best_cost) and self.is_stable(r, c):
+                        best, best_cost = (r, c), cost
+                        if cost == (k - 1) ** 2:
+                            return best
+
+            if best is not None and best_cost <= k * k:
+                return best
+            k += 1
+
+    def is_stable(self, r, c):
+        rows = self.rows
+        a = rows[r][c]
+        return not self.backend.is_near_zero(a) and abs(a) >= self.threshold * max([abs(rows[i][c]) for i in self.columns[c]])
+
+    # -----------------------------------------------------------------------------
+    # eliminate(self, p, c):
+    #   Use row p to eliminate column c from the other active rows. Row p is then
+    #   set aside, unchanged, for back substitution.
+    def eliminate(self, p, c):
+        rows, columns = self.rows, self.columns
+        is_near_zero = self.backend.is_near_zero
+        pivot_row = rows[p]
+        pivot_term = pivot_row[c]
+        k = self.constants[p]
+
+        _rebucket(self.row_buckets, self.row_counts, p, 0)
+        for j in pivot_row:
+            columns[j].discard(p)
+
+        for r in columns.pop(c):
+            row = rows[r]
+            factor = row.pop(c) / pivot_term            # eliminated exactly, not up to rounding
+
+            for j, a in pivot_row.items():
+                if j == c:
+                    continue
+                if j in row:
+                    x = row[j] - factor * a
+                    if is_near_zero(x):
+                        del row[j]
+                        columns[j].discard(r)
+                    else:
+                        row[j] = x
+                else:
+                    x = - factor * a
+                    if not is_near_zero(x):
+                        row[j] = x
+                        columns[j].add(r)
+                        self.fill_in += 1
+
+            self.constants[r] -= factor * k
+            _rebucket(self.row_buckets, self.row_counts, r, len(row))
+
+        _rebucket(self.column_buckets, self.column_counts, c, 0)
+        for j in pivot_row:
+            if j in columns:
+                if columns[j]:
+                    _rebucket(self.column_buckets, self.column_counts, j, len(columns[j]))
+                else:
+                    del columns[j]
+                    _rebucket(self.column_buckets, self.column_counts, j, 0)
+
+        self.pivots.append((p, c))
+        self.factor_nonzeros += len(pivot_row)
+
+    def is_consistent(self):                            # rows without a pivot read 0 = k
+        pivot_rows = set(p for p, _ in self.pivots)
+        return all(self.backend.is_near_zero(k) for r, k in enumerate(self.constants) if r not in pivot_rows)
+
+    # -----------------------------------------------------------------------------
+    # make_parametric(self):
+    #   Back substitution in reverse pivot order. Every variable is kept as a base
+    #   value plus coefficients of the free variables (those never pivoted), which
+    #   give the basepoint and direction vectors of the Parametrization.
+    def make_parametric(self):
+        zero, one = self.backend.zero, self.backend.one
+        pivot_columns = set(c for _, c in self.pivots)
+        free_variables = [j for j in range(self.dimension) if j not in pivot_columns]
+
+        values = {f: (zero, {f: one}) for f in free_variables}
+        for p, c in reversed(self.pivots):
+            row = self.rows[p]
+            base = self.constants[p]
+            coefficients = {}
+            for j, a in row.items():
+                if j == c:
+                    continue
+                b, cf = values[j]
+                base -= a * b
+                for f, x in cf.items():
+                    coefficients[f] = coefficients.get(f, zero) - a * x
+            pivot_term = row[c]
+            values[c] = (base / pivot_term, {f: x / pivot_term for f, x in coefficients.items()})
+
+        base_point = tuple(values[j][0] for j in range(self.dimension))
+        dir_vectors = [Vector._from_coords(tuple(values[j][1].get(f, zero) for j in range(self.dimension)),
+                                           self.backend)
+                       for f in free_variables]
+
+        return Parametrization(Vector._from_coords(base_point, self.backend), dir_vectors)
+
+
+def _rebucket(buckets, counts, key, count):
+    old = counts.get(key)
+    if old is not None:
+        buckets[old].discard(key)
+        if not buckets[old]:
+            del buckets[old]
+    if count:
+        counts[key] = count
+        buckets.setdefault(count, set()).add(key)
+    else:
+        counts.pop(key, None)
+
+
+def test():
+    from plane import Plane
+    from elimination import AugmentedMatrix
+
+    p1 = Plane(normal_vector=Vector(['8.631', '5.112', '-1.816']), constant_term='-5.113')
+    p2 = Plane(normal_vector=Vector(['4.315', '11.132', '-5.27']), constant_term='-6.775')
+    p3 = Plane(normal_vector=Vector(['-2.158', '3.01', '-1.727']), constant_term='-0.831')
+    s = LinearSystem([p1, p2, p3])
+    print(SparseLinearSystem.from_system(s).solve_system())
+    print('matches AugmentedMatrix:',
+          str(SparseLinearSystem.from_system(s).solve_system()) == str(AugmentedMatrix(s).solve_system()))
+
+    p1 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['1', '1', '1']), constant_term='2')
+    print(SparseLinearSystem.from_system(LinearSystem([p1, p2])).solve_system())
+
+    p1 = Plane(normal_vector=Vector(['0', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['1', '-1', '1']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['1', '2', '-5']), constant_term='3')
+    print(SparseLinearSystem.from_system(LinearSystem([p1, p2, p3])).solve_system())
+
+    # rank-deficient and near-singular systems give the same status and solution
+    # set as LinearSystem.solve_system(): coefficients within 1e-10 of zero are zeros
+    def same_solution_set(system, dense, sparse):
+        if isinstance(dense, str) or isinstance(sparse, str):
+            return dense == sparse
+        return len(dense.direction_vectors) == len(sparse.direction_vectors) and all(
+            abs(p.normal_vector.dot_product(sparse.basepoint) - p.constant_term) < 1e-9
+            and all(abs(p.normal_vector.dot_product(v)) < 1e-9 for v in sparse.direction_vectors)
+            for p in system.planes)
+
+    for rows in ([['1e-12', '0', '0', '1'], ['0', '1', '0', '1'], ['0', '0', '1', '1']],
+                 [['1', '2', '0', '1'], ['0', '1', '-1', '2'], ['1', '3', '-1', '3']],
+                 [['1', '2', '0', '1'], ['0', '1', '-1', '2'], ['1', '3', '-1', '4']],
+                 [['1', '2', '0', '1'], ['0', '1', '-1', '2'], ['1', '3', '-1.000000000001', '3']]):
+        s = LinearSystem([Plane(normal_vector=Vector(r[:-1]), constant_term=r[-1]) for r in rows])
+        dense, sparse = s.solve_system(), SparseLinearSystem.from_system(s).solve_system()
+        print('{}: matches LinearSystem: {}'.format(
+            sparse if isinstance(sparse, str) else '{} free variable(s)'.format(len(sparse.direction_vectors)),
+            same_solution_set(s, dense, sparse)))
+
+    # arrowhead system: x_0 appears in every equation, and equation 0 holds every
+    # variable. Eliminating x_0 first fills the whole matrix; Markowitz leaves it last
+    n = 100
+    vectors = [SparseVector({j: 1 for j in range(n)}, n)] + \
+              [SparseVector({0: 1, i: 2}, n) for i in range(1, n)]
+    constants = [n] + [3] * (n - 1)
+    for ordering in (SparseLinearSystem.NATURAL, SparseLinearSystem.MARKOWITZ):
+        system = SparseLinearSystem(vectors, constants)
+        solution = system.solve_system(ordering=ordering)
+        print('{}: {}, x = ({:.3f}, {:.3f}, ...)'.format(ordering, system, solution.basepoint[0], solution.basepoint[1]))
+
+
+if __name__ == '__main__':
+    test()
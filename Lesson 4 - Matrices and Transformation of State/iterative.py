@@ -0,0 +1,323 @@
+import math
+from decimal import getcontext
+from operator import mul
+
+from vector import Vector
+from numeric import FLOAT64
+from matrix import Matrix
+
+getcontext().prec = 30
+
+
+class LinearOperator(object):
+
+    MATRIX_MUST_BE_SQUARE = Matrix.MATRIX_MUST_BE_SQUARE
+    ROWS_REQUIRED_MSG = 'This method needs the rows of the matrix, not only its products'
+
+    # -----------------------------------------------------------------------------
+    # LinearOperator(n, matvec, diagonal, rows):
+    #   A square n x n matrix A seen through what the iterative solvers need of it.
+    #   A matrix-free operator only provides matvec(x) = A x, e.g. a stencil or a
+    #   product of factors that is never formed; conjugate_gradient() and jacobi()
+    #   work from it (jacobi() also needs the diagonal). gauss_seidel() needs the
+    #   rows themselves, and reads the diagonal off them when it is not given.
+    #
+    #   from_rows() builds the operator of an explicit matrix, keeping only the
+    #   nonzero entries of each row, so each product costs O(nonzeros).
+    #
+    # Arguments:
+    #   n: the number of unknowns
+    #   matvec: function mapping a list of n floats x to the list A x
+    #   diagonal: list of the n diagonal entries, if known
+    #   rows: list of (columns, values) tuples holding the nonzeros of each row
+    def __init__(self, n, matvec, diagonal=None, rows=None):
+        self.n = n
+        self.matvec = matvec
+        self.diagonal = diagonal
+        self.rows = rows
+
+    @classmethod
+    def from_rows(cls, rows, n=None):
+        n = len(rows) if n is None else n
+        if len(rows) != n:
+            raise Exception(cls.MATRIX_MUST_BE_SQUARE)
+        sparse_rows = []
+        diagonal = [0.0] * n
+
+        for i, row in enumerate(rows):
+            if isinstance(row, dict):
+                items = sorted(row.items())
+                if items and not 0 <= items[0][0] <= items[-1][0] < n:
+                    raise Exception(cls.MATRIX_MUST_BE_SQUARE)
+            elif len(row) != n:
+                raise Exception(cls.MATRIX_MUST_BE_SQUARE)
+            else:
+                items = enumerate(row)
+            items = [(j, float(a)) for j, a in items if a != 0]
+            sparse_rows.append((tuple(j for j, _ in items), tuple(a for _, a in items)))
+            diagonal[i] = dict(items).get(i, 0.0)
+
+        def matvec(x):
+            get = x.__getitem__
+            return [sum(map(mul, values, map(get, columns))) for columns, values in sparse_rows]
+
+        return cls(n, matvec, diagonal, sparse_rows)
+
+
+class IterativeResult(object):
+
+    # outcome of an iterative solve: the approximate solution (a float64 Vector),
+    # the number of iterations run, the final relative residual |b - A x| / |b|,
+    # whether it reached the tolerance, and the residual after every iteration
+    def __init__(self, solution, iterations, residual, converged, history):
+        self.solution = solution
+        self.iterations = iterations
+        self.residual = residual
+        self.converged = converged
+        self.history = history
+
+    def __str__(self):
+        return '{} after {} iterations, relative residual {:.3e}'.format(
+            'Converged' if self.converged else 'Not converged', self.iterations, self.residual)
+
+
+ZERO_ON_DIAGONAL_MSG = 'The method needs a nonzero diagonal'
+NO_CONSTANT_TERMS_MSG = 'The constant terms b must be given for this input'
+WRONG_NUMBER_OF_CONSTANTS_MSG = 'The number of constant terms must match the number of equations'
+WRONG_INITIAL_GUESS_DIM_MSG = 'The initial guess must have one value per unknown'
+
+
+# -----------------------------------------------------------------------------
+# Common arguments of jacobi(), gauss_seidel() and conjugate_gradient():
+#   A: a LinearSystem (with n equations in n variables), a SparseLinearSystem, a
+#      Matrix, or a LinearOperator
+#   b: the constant terms; by default those of a LinearSystem
+#   x0: initial guess (warm start), a Vector or sequence, zero by default
+#   tol: stop once |b - A x| <= tol |b|
+#   max_iterations: stop after this many iterations even if not converged
+#   callback: function called after every iteration as callback(iteration,
+#      relative_residual, x); returning True stops the iteration
+#
+# Returns:
+#   an IterativeResult object
+#
+# The iterations run in float64: they converge to the tolerance, not to the
+# exact Decimal or Fraction solution that LinearSystem.solve_system() computes.
+
+# -----------------------------------------------------------------------------
+# jacobi(A, b, x0, tol, max_iterations, callback):
+#   x_(k+1) = x_k + D⁻¹ (b - A x_k), D the diagonal of A. Each iteration is one
+#   product with A, so it works matrix-free. Converges for strictly diagonally
+#   dominant systems.
+def jacobi(A, b=None, x0=None, tol=1e-10, max_iterations=1000, callback=None):
+    A, b, x = _setup(A, b, x0)
+    if A.diagonal is None or any(d == 0 for d in A.diagonal):
+        raise Exception(ZERO_ON_DIAGONAL_MSG)
+    inverse_diagonal = [1.0 / d for d in A.diagonal]
+    b_norm = _norm(b) or 1.0
+    history = []
+
+    for iteration in range(max_iterations + 1):
+        r = [bi - ai for bi, ai in zip(b, A.matvec(x))]
+        residual = _norm(r) / b_norm
+        if iteration:
+            history.append(residual)
+            if callback is not None and callback(iteration, residual, x):
+                break
+        if residual <= tol or iteration == max_iterations:
+            break
+        x = [xi + ri * di for xi, ri, di in zip(x, r, inverse_diagonal)]
+
+    return _result(x, iteration, residual, tol, history)
+
+
+# -----------------------------------------------------------------------------
+# gauss_seidel(A, b, x0, omega, tol, max_iterations, callback):
+#   Sweep through the equations, solving equation i for x_i with the values
+#   already updated in this sweep. omega != 1 gives successive over-relaxation
+#   (SOR): x_i moves omega times the Gauss-Seidel step, 1 < omega < 2 usually
+#   speeding up convergence for SPD systems. Needs the rows of A.
+def gauss_seidel(A, b=None, x0=None, omega=1.0, tol=1e-10, max_iterations=1000, callback=None):
+    A, b, x = _setup(A, b, x0)
+    if A.rows is None:
+        raise Exception(LinearOperator.ROWS_REQUIRED_MSG)
+    diagonal = A.diagonal
+    if diagonal is None:
+        diagonal = [dict(zip(columns, values)).get(i, 0.0) for i, (columns, values) in enumerate(A.rows)]
+    if any(d == 0 for d in diagonal):
+        raise Exception(ZERO_ON_DIAGONAL_MSG)
+    b_norm = _norm(b) or 1.0
+    history = []
+    residual = _residual(A, b, x) / b_norm
+
+    iteration = 0
+    while residual > tol and iteration < max_iterations:
+        get = x.__getitem__
+        for i, (columns, values) in enumerate(A.rows):
+            d = diagonal[i]
+            sigma = sum(map(mul, values, map(get, columns))) - d * x[i]     # off-diagonal terms
+            x[i] += omega * ((b[i] - sigma) / d - x[i])
+
+        iteration += 1
+        residual = _residual(A, b, x) / b_norm
+        history.append(residual)
+        if callback is not None and callback(iteration, residual, x):
+            break
+
+    return _result(x, iteration, residual, tol, history)
+
+
+# -----------------------------------------------------------------------------
+# conjugate_gradient(A, b, x0, tol, max_iterations, preconditioner, callback):
+#   Preconditioned conjugate gradient for symmetric positive definite A. In
+#   exact arithmetic it converges in at most n iterations, usually far fewer;
+#   each iteration is one product with A, so it works matrix-free.
+#
+# Arguments:
+#   preconditioner: 'jacobi' (divide by the diagonal of A, when it is known),
+#       None, or a function z = M⁻¹ r approximating the solve A z = r
+def conjugate_gradient(A, b=None, x0=None, tol=1e-10, max_iterations=1000, preconditioner='jacobi', callback=None):
+    A, b, x = _setup(A, b, x0)
+
+    if preconditioner == 'jacobi':
+        if A.diagonal is None or any(d <= 0 for d in A.diagonal):
+            preconditioner = None
+        else:
+            inverse_diagonal = [1.0 / d for d in A.diagonal]
+            preconditioner = lambda r: [ri * di for ri, di in zip(r, inverse_diagonal)]
+    if preconditioner is None:
+        preconditioner = list
+
+    b_norm = _norm(b) or 1.0
+    history = []
+    r = [bi - ai for bi, ai in zip(b, A.matvec(x))]
+    residual = _norm(r) / b_norm
+    z = preconditioner(r)
+    p = list(z)
+    rz = _dot(r, z)
+
+    iteration = 0
+    while residual > tol and iteration < max_iterations:
+        Ap = A.matvec(p)
+        pAp = _dot(p, Ap)
+        if pAp <= 0:                                    # breakdown: A not positive definite along p
+            break
+        alpha = rz / pAp
+        x = [xi + alpha * pi for xi, pi in zip(x, p)]
+        r = [ri - alpha * qi for ri, qi in zip(r, Ap)]
+
+        iteration += 1
+        residual = _norm(r) / b_norm
+        history.append(residual)
+        if callback is not None and callback(iteration, residual, x):
+            break
+
+        z = preconditioner(r)
+        rz, rz_old = _dot(r, z), rz
+        beta = rz / rz_old
+        p = [zi + beta * pi for zi, pi in zip(z, p)]
+
+    return _result(x, iteration, residual, tol, history)
+
+
+def _setup(A, b, x0):
+    if hasattr(A, 'planes'):                            # LinearSystem
+        if b is None:
+            b = [p.constant_term for p in A.planes]
+        operator = LinearOperator.from_rows([p.normal_vector.coordinates for p in A.planes], A.dimension)
+    elif hasattr(A, 'normal_vectors'):                  # SparseLinearSystem
+        if b is None:
+            b = A.constant_terms
+        operator = LinearOperator.from_rows([v.entries for v in A.normal_vectors], A.dimension)
+    elif isinstance(A, Matrix):
+        operator = LinearOperator.from_rows(A.matrix)
+    else:
+        operator = A
+
+    if b is None:
+        raise Exception(NO_CONSTANT_TERMS_MSG)
+    b = [float(x) for x in (b.coordinates if isinstance(b, Vector) else b)]
+    if len(b) != operator.n:
+        raise Exception(WRONG_NUMBER_OF_CONSTANTS_MSG)
+    x = [0.0] * operator.n if x0 is None else [float(v) for v in (x0.coordinates if isinstance(x0, Vector) else x0)]
+    if len(x) != operator.n:
+        raise Exception(WRONG_INITIAL_GUESS_DIM_MSG)
+    return operator, b, x
+
+
+def _result(x, iterations, residual, tol, history):
+    return IterativeResult(Vector(x, FLOAT64), iterations, residual, residual <= tol, history)
+
+
+def _residual(A, b, x):
+    return _norm([bi - ai for bi, ai in zip(b, A.matvec(x))])
+
+
+def _dot(u, v):
+    return math.fsum(map(mul, u, v))
+
+
+def _norm(v):
+    return math.sqrt(_dot(v, v))
+
+
+def test():
+    from plane import Plane
+    from linsys import LinearSystem
+
+    p1 = Plane(normal_vector=Vector(['10', '-1', '2']), constant_term='6')
+    p2 = Plane(normal_vector=Vector(['-1', '11', '-1']), constant_term='25')
+    p3 = Plane(normal_vector=Vector(['2', '-1', '10']), constant_term='-11')
+    s = LinearSystem([p1, p2, p3])
+    print('direct:', round(s.solve_system().basepoint, 6))
+
+    for name, solve in (('jacobi', jacobi), ('gauss-seidel', gauss_seidel), ('conjugate gradient', conjugate_gradient)):
+        result = solve(s)
+        print('{}: {} {}'.format(name, round(result.solution, 6), result))
+    print('SOR, omega = 1.1:', gauss_seidel(s, omega=1.1))
+
+    # warm start and per-iteration monitoring, on a Matrix
+    A = Matrix([[4, 1, 0], [1, 3, -1], [0, -1, 2]])
+    residuals = []
+    result = conjugate_gradient(A, [1, 2, 3], x0=[0.1, 0.6, 1.8],
+                                callback=lambda i, residual, x: residuals.append(round(residual, 8)))
+    print('warm-started CG:', round(result.solution, 6), residuals)
+
+    # matrix-free: the 1-D Laplacian  2 x_i - x_(i-1) - x_(i+1)  is never stored
+    n = 200
+
+    def laplacian(x):
+        return [2 * x[i] - (x[i-1] if i else 0.0) - (x[i+1] if i < n - 1 else 0.0) for i in range(n)]
+
+    operator = LinearOperator(n, laplacian, diagonal=[2.0] * n)
+    result = conjugate_gradient(operator, [1.0] * n, max_iterations=500)
+    print('matrix-free CG, n = {}: {}'.format(n, result))
+    result = jacobi(operator, [1.0] * n, max_iterations=500)
+    print('matrix-free Jacobi, n = {}: {}'.format(n, result))
+
+    try:
+        gauss_seidel(operator, [1.0] * n)
+    except Exception as e:
+        print(e)
+
+    # rows without the diagonal: gauss_seidel() reads it off the rows
+    explicit = LinearOperator.from_rows([[4, 1, 0], [1, 3, -1], [0, -1, 2]])
+    operator = LinearOperator(3, explicit.matvec, rows=explicit.rows)
+    print('Gauss-Seidel, rows only:', round(gauss_seidel(operator, [1, 2, 3]).solution, 6))
+    try:
+        gauss_seidel(LinearOperator(2, None, rows=[((1,), (1.0,)), ((0,), (1.0,))]), [1, 1])
+    except Exception as e:
+        print(e)
+
+    # indefinite A: CG stops at the breakdown instead of dividing by p·Ap <= 0
+    print('CG, indefinite:', conjugate_gradient(Matrix([[1, 0], [0, -1]]), [1, 2], preconditioner=None))
+
+    for A, b in ((Matrix([[2, 0, 0], [0, 3, 0]]), [1, 1]), (Matrix([[2, 0], [0, 3]]), [1, 1, 1])):
+        try:
+            jacobi(A, b)
+        except Exception as e:
+            print(e)
+
+
+if __name__ == '__main__':
+    test()
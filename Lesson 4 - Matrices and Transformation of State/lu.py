@@ -0,0 +1,192 @@
+from decimal import getcontext
+
+from vector import Vector
+from numeric import get_backend
+from matrix import Matrix
+
+getcontext().prec = 30
+
+
+class LUFactorization(object):
+
+    MATRIX_MUST_BE_SQUARE = Matrix.MATRIX_MUST_BE_SQUARE
+    MATRIX_IS_SINGULAR_MSG = 'The matrix is singular, so the system has no unique solution'
+    WRONG_NUMBER_OF_CONSTANTS_MSG = 'The number of constant terms must match the number of equations'
+
+    # -----------------------------------------------------------------------------
+    # LUFactorization(A, backend):
+    #   Factor a square coefficient matrix once as P A = L U, with partial pivoting
+    #   (largest pivot in each column): P a row permutation, L unit lower
+    #   triangular and U upper triangular. L (below the diagonal) and U (on and
+    #   above it) share one n x n list of rows. Factoring costs O(n³); every
+    #   right-hand side solved afterwards only costs a forward and a back
+    #   substitution, O(n²), instead of a new elimination.
+    #
+    # Arguments:
+    #   A: a Matrix, or a LinearSystem whose normal vectors are the rows of A (the
+    #      constant terms are ignored: they are passed to solve())
+    #   backend: numeric backend of the factorization, by default that of A
+    def __init__(self, A, backend=None):
+        if isinstance(A, Matrix):
+            rows = A.matrix
+        else:
+            rows = [p.normal_vector.coordinates for p in A.planes]
+
+        self.backend = get_backend(backend if backend is not None else A.backend)
+        self.n = len(rows)
+        if any(len(r) != self.n for r in rows):
+            raise Exception(self.MATRIX_MUST_BE_SQUARE)
+
+        self.LU = [list(self.backend.coords(r)) for r in rows]
+        self.permutation = list(range(self.n))          # row i of P A is row permutation[i] of A
+        self.row_swaps = 0
+        self._factor()
+
+    def _factor(self):
+        LU = self.LU
+        n = self.n
+
+        for k in range(n):
+            pivot_row = max(range(k, n), key=lambda i: abs(LU[i][k]))
+            if self.backend.is_near_zero(LU[pivot_row][k]):
+                raise Exception(self.MATRIX_IS_SINGULAR_MSG)
+
+            if pivot_row != k:
+                LU[k], LU[pivot_row] = LU[pivot_row], LU[k]
+                self.permutation[k], self.permutation[pivot_row] = self.permutation[pivot_row], self.permutation[k]
+                self.row_swaps += 1
+
+            pivot = LU[k]
+            pivot_term = pivot[k]
+            for i in range(k + 1, n):
+                row = LU[i]
+                if row[k] == 0:
+                    continue
+                factor = row[k] / pivot_term
+                row[k] = factor                                 # the multiplier is stored as L[i][k]
+                for j in range(k + 1, n):
+                    row[j] -= factor * pivot[j]
+
+    # -----------------------------------------------------------------------------
+    # solve(self, b):
+    #   Solve A x = b for one right-hand side by forward substitution (L y = P b)
+    #   then back substitution (U x = y).
+    #
+    # Arguments:
+    #   b: the constant terms, a Vector or a sequence of n numbers
+    #
+    # Returns:
+    #   a Vector object x
+    def solve(self, b):
+        b = b.coordinates if isinstance(b, Vector) else b
+        if len(b) != self.n:
+            raise Exception(self.WRONG_NUMBER_OF_CONSTANTS_MSG)
+
+        convert = self.backend.convert
+        LU = self.LU
+        n = self.n
+
+        y = [convert(b[p]) for p in self.permutation]
+        for i in range(1, n):
+            row = LU[i]
+            y[i] -= sum([row[j] * y[j] for j in range(i)], self.backend.zero)
+
+        for i in reversed(range(n)):
+            row = LU[i]
+            y[i] = (y[i] - sum([row[j] * y[j] for j in range(i + 1, n)], self.backend.zero)) / row[i]
+
+        return Vector._from_coords(tuple(y), self.backend)
+
+    # -----------------------------------------------------------------------------
+    # solve_many(self, B):
+    #   Solve A X = B for k right-hand sides at once: the substitutions work on
+    #   whole rows of B, so the factors are traversed once for all k columns.
+    #
+    # Arguments:
+    #   B: an n x k Matrix (or list of rows) whose columns are the right-hand sides,
+    #      as in Matrix.get_ref(right_side_M)
+    #
+    # Returns:
+    #   an n x k Matrix X, column j solving A x = column j of B
+    def solve_many(self, B):
+        B = B.matrix if isinstance(B, Matrix) else B
+        if len(B) != self.n:
+            raise Exception(self.WRONG_NUMBER_OF_CONSTANTS_MSG)
+
+        convert = self.backend.convert
+        LU = self.LU
+        n = self.n
+
+        Y = [[convert(x) for x in B[p]] for p in self.permutation]
+        for i in range(1, n):
+            row, y = LU[i], Y[i]
+            for j in range(i):
+                factor = row[j]
+                if factor != 0:
+                    y[:] = [a - factor * b for a, b in zip(y, Y[j])]
+
+        for i in reversed(range(n)):
+            row, y = LU[i], Y[i]
+            for j in range(i + 1, n):
+                factor = row[j]
+                if factor != 0:
+                    y[:] = [a - factor * b for a, b in zip(y, Y[j])]
+            y[:] = [a / row[i] for a in y]
+
+        return Matrix(Y, backend=self.backend)
+
+    def determinant(self):
+        det = (-1) ** self.row_swaps
+        for i in range(self.n):
+            det *= self.LU[i][i]
+        return det
+
+    def inverse(self):
+        return self.solve_many(Matrix('I', self.n, self.backend))
+
+    def __str__(self):
+        return 'LUFactorization: {0} x {0}, row permutation {1}'.format(self.n, self.permutation)
+
+
+def test():
+    from plane import Plane
+    from linsys import LinearSystem
+
+    p1 = Plane(normal_vector=Vector(['0', '1', '1']), constant_term='1')
+    p2 = Plane(normal_vector=Vector(['1', '-1', '1']), constant_term='2')
+    p3 = Plane(normal_vector=Vector(['1', '2', '-5']), constant_term='3')
+    s = LinearSystem([p1, p2, p3])
+
+    lu = LUFactorization(s)
+    print(lu)
+    print('solve:', round(lu.solve(['1', '2', '3']), 3))
+    print('matches solve_system:', round(lu.solve(['1', '2', '3']), 10) == round(s.solve_system().basepoint, 10))
+
+    B = Matrix([[1, 0, 2],
+                [2, 1, 0],
+                [3, 0, 1]])
+    print(lu.solve_many(B))
+
+    A = Matrix([[1, 6, 5],
+                [3, 1, 1],
+                [2, 1, 2]])
+    lu = LUFactorization(A)
+    print('determinant:', lu.determinant())
+    print(lu.inverse())
+
+    try:
+        LUFactorization(Matrix([[1, 2], [2, 4]]))
+    except Exception as e:
+        print(e)
+
+    # one factorization, many right-hand sides
+    A = Matrix([[(i * 7 + j * 3) % 11 + (10 if i == j else 0) for j in range(30)] for i in range(30)], backend='float64')
+    rhs = [[(i + k) % 5 for i in range(30)] for k in range(200)]
+    lu = LUFactorization(A)
+    X = lu.solve_many(Matrix(rhs).transpose())
+    print('200 right-hand sides, solve and solve_many agree:',
+          all(abs(a - b) < 1e-12 for k, b_k in enumerate(rhs) for a, b in zip(lu.solve(b_k), X.get_column(k))))
+
+
+if __name__ == '__main__':
+    test()
@@ -1,5 +1,6 @@
 from decimal import Decimal, getcontext
 from vector import Vector
+from numeric import get_backend, precision
 from copy import deepcopy
 
 getcontext().prec = 30
@@ -14,9 +15,12 @@ class Matrix(object):
     MATRIX_NOT_INVERTIBLE = 'The matrix is not invertible since det(A) = 0'
     ALL_ROWS_MUST_BE_IN_SAME_DIM_MSG = 'All rows should have the same length'
 
-    def __init__(self, M=None, size=0):
+    def __init__(self, M=None, size=0, backend=None):
         self.square = False
         self.is_ref = False
+        self.row_swaps = 0
+        self.growth_factor = None           # set by get_ref() on the echelon form it returns
+        self.backend = get_backend(backend)
 
         if type(M) == list:
             d = len(M[0])
@@ -52,55 +56,82 @@ class Matrix(object):
 
                     self[i].append(element)
 
-    def get_inverse(self):
-        self.is_square()
-        det, ref_M, right_side_M = self.get_determinant(Matrix('I', self.n_dim))
+    def get_inverse(self, prec=None, partial_pivoting=False):   # 'prec': Decimal precision for this call only
+        self.is_square()                                            # (see numeric.precision)
 
-        try:
-            assert det != 0
+        with precision(prec):
+            det, ref_M, right_side_M = self.get_determinant(Matrix('I', self.n_dim, self.backend), partial_pivoting)
 
-        except AssertionError:
-            Exception(self.MATRIX_NOT_INVERTIBLE)
+            try:
+                assert det != 0
 
-        return ref_M.get_rref(right_side_M)[1]
+            except AssertionError:
+                Exception(self.MATRIX_NOT_INVERTIBLE)
 
-    def get_determinant(self, right_side_M=None):
+            inverse = ref_M.get_rref(right_side_M)[1]
+            inverse.growth_factor = ref_M.growth_factor
+            return inverse
+
+    def get_determinant(self, right_side_M=None, partial_pivoting=False):
         self.is_square()
-        det = 1
-        ref_M, right_side_M = self.get_ref(right_side_M)
+        ref_M, right_side_M = self.get_ref(right_side_M, partial_pivoting)
+        det = (-1) ** ref_M.row_swaps                   # each row swap flips the sign of the determinant
 
         for i in range(self.m_dim):
             det *= ref_M[i, i]
 
         return det, ref_M, right_side_M
 
-    def get_ref(self, right_side_M):
-        left_side_M = deepcopy(self)
+    def get_ref(self, right_side_M, partial_pivoting=False):    # 'partial_pivoting': among the rows with the
+        left_side_M = deepcopy(self)                            # smallest pivot index, use the largest pivot term
+        left_side_M.row_swaps = 0
+        convert = self.backend.convert                          # integer entries must not fall back to float division
+        initial_max = max([abs(convert(x)) for row in left_side_M.matrix for x in row])     # growth factor: largest
+        largest = initial_max                                   # intermediate |a_ij| / largest original |a_ij|
+        pivot_indices = left_side_M.get_row_pivot()             # computed once, then kept up to date as rows are
+                                                                # swapped and reduced: O(n³) instead of O(n⁴)
 
-        for i in range(left_side_M.m_dim-1):
-            pivot_indices = left_side_M.get_row_pivot()         # find next row below row_i with the lowest
-            sub_pivot_indices = pivot_indices[i+1:]             # index containing the first pivot term
-            smallest_pivot_i = min(sub_pivot_indices)
+        def sort_key(pivot_i):                                  # rows of zeros (pivot index -1) go last
+            return left_side_M.n_dim if pivot_i == -1 else pivot_i
 
-            if smallest_pivot_i < pivot_indices[i]:             # swap row i with row that has the smallest pivot index
-                row_to_swap = sub_pivot_indices.index(smallest_pivot_i) + i + 1
+        for i in range(left_side_M.m_dim-1):
+            sub_pivot_indices = pivot_indices[i+1:]                         # find next row below row_i with the
+            smallest_pivot_i = min(sub_pivot_indices, key=sort_key)         # lowest index containing the first
+                                                                            # pivot term
+            if sort_key(smallest_pivot_i) < sort_key(pivot_indices[i]):     # swap row i with row that has the
+                row_to_swap = sub_pivot_indices.index(smallest_pivot_i) + i + 1     # smallest pivot index
                 left_side_M.swap_rows(i, row_to_swap)
+                pivot_indices[i], pivot_indices[row_to_swap] = pivot_indices[row_to_swap], pivot_indices[i]
 
                 if right_side_M:
                     right_side_M.swap_rows(i, row_to_swap)
 
-            for j in range(i+1, left_side_M.m_dim):
-                pivot_indices = left_side_M.get_row_pivot()     # update the pivot indices of each row in matrix
+            pivot_i = pivot_indices[i]
+            if pivot_i == -1:                                   # only rows of zeros are left
+                break
 
-                if pivot_indices[i] == pivot_indices[j]:                    # if the FNZT index of the row_j
-                    numerator = left_side_M.matrix[j][pivot_indices[j]]     # matches the FNZT index of the
-                    denominator = left_side_M.matrix[i][pivot_indices[i]]   # current row then multiply coefficient
-                    beta = (-1) * numerator / denominator                   # with row_i, add that to row_j and
-                    left_side_M.add_scaled_row_to_row(beta, i, j)           # replace row_j with result
+            if partial_pivoting:
+                row_to_swap = max((j for j in range(i, left_side_M.m_dim) if pivot_indices[j] == pivot_i),
+                                  key=lambda j: abs(convert(left_side_M.matrix[j][pivot_i])))
+                if row_to_swap != i:
+                    left_side_M.swap_rows(i, row_to_swap)
+
+                    if right_side_M:
+                        right_side_M.swap_rows(i, row_to_swap)
+
+            for j in range(i+1, left_side_M.m_dim):
+                if pivot_indices[j] == pivot_i:                                 # if the FNZT index of the row_j
+                    numerator = left_side_M.matrix[j][pivot_i]                  # matches the FNZT index of the
+                    denominator = left_side_M.matrix[i][pivot_i]                # current row then multiply coefficient
+                    beta = (-1) * convert(numerator) / convert(denominator)     # with row_i, add that to row_j and
+                    left_side_M.add_scaled_row_to_row(beta, i, j)               # replace row_j with result
+                    pivot_indices[j] = left_side_M.get_pivot_index(j, pivot_i + 1)
+                    largest = max(largest, max([abs(x) for x in left_side_M.matrix[j]]))
 
                     if right_side_M:
                         right_side_M.add_scaled_row_to_row(beta, i, j)
 
+        left_side_M.growth_factor = float(largest / initial_max) if initial_max else 1.0
         left_side_M.is_ref = True
         return left_side_M, right_side_M
 
@@ -111,10 +142,11 @@ class Matrix(object):
             left_side_M = deepcopy(self)
 
         pivot_indices = left_side_M.get_row_pivot()
+        convert = self.backend.convert
 
         for row_i, pivot_i in enumerate(pivot_indices):      # 'row_i' indexes each row in the system of eq. referenced
-            pivot_term = left_side_M.matrix[row_i][pivot_i]   # by 'tf' for which row-reduction will be performed
-
+            pivot_term = convert(left_side_M.matrix[row_i][pivot_i])    # by 'tf' for which row-reduction will be
+                                                                        # performed
             if not (pivot_term == 1 or pivot_i == -1):
                 left_side_M.scale_row(1/pivot_term, row_i)
                 right_side_M.scale_row(1/pivot_term, row_i)
@@ -131,7 +163,7 @@ class Matrix(object):
                 except ValueError:                          # that has a pivot term at the same index as 'term_i'
                     continue
 
-                beta = (-1) * term / left_side_M.matrix[row_j][term_i]         # do row-reduction on target row: 'row_i'
+                beta = (-1) * convert(term) / convert(left_side_M.matrix[row_j][term_i])  # do row-reduction on 'row_i'
                 left_side_M.add_scaled_row_to_row(beta, row_j, row_i)    # using 'row_j'
                 right_side_M.add_scaled_row_to_row(beta, row_j, row_i)
 
@@ -139,26 +171,26 @@ class Matrix(object):
 
     def swap_rows(self, row_i, row_j):
         self[row_i], self[row_j] = self[row_j], self[row_i]
+        self.row_swaps += 1
 
     def scale_row(self, factor, row_i):
         scaled_row = Matrix([self[row_i]]).scalar_mult(factor)
         self[row_i] = scaled_row[0]
 
     def add_scaled_row_to_row(self, factor, row_s, row_t):
-        new_row = Vector(self[row_s]).scalar_mult(factor) + Vector(self[row_t])
+        new_row = Vector(self[row_s], self.backend).scalar_mult(factor) + Vector(self[row_t], self.backend)
         self[row_t] = list(new_row.coordinates)
 
     def get_row_pivot(self):
-        num_rows = self.m_dim
-        indices = [-1] * num_rows
-
-        for i, row in enumerate(self.matrix):
-            for j, e in enumerate(row):
-                if not MyDecimal(e).is_near_zero():
-                    indices[i] = j
-                    break
+        return [self.get_pivot_index(i) for i in range(self.m_dim)]
 
-        return indices
+    # index of the first nonzero entry of row i at or after column 'start', -1 if none
+    def get_pivot_index(self, i, start=0):
+        row = self.matrix[i]
+        for j in range(start, self.n_dim):
+            if not self.backend.is_near_zero(self.backend.convert(row[j])):
+                return j
+        return -1
 
     def is_square(self):
         try:
@@ -181,7 +213,7 @@ class Matrix(object):
         for i in range(self.n_dim):
             transp_M.append(self.get_column(i))
 
-        return Matrix(transp_M)
+        return Matrix(transp_M, backend=self.backend)
 
     def matrix_mult(self, M):
         try:
@@ -192,16 +224,16 @@ class Matrix(object):
 
         new_M = []
         M_t = M.transpose()
+        columns = [Vector(M_t[j], self.backend) for j in range(M.n_dim)]    # the columns of 'M' are converted once
 
         for i in range(self.m_dim):             # for each row in 'self' matrix put that row into a vector object
-            row_1 = Vector(self[i])
+            row_1 = Vector(self[i], self.backend)
             new_M.append([])
 
-            for j in range(M.n_dim):                        # multiply each row of the 'self' matrix with each row of
-                row_2 = Vector(M_t[j])               # the transposed 'M' matrix
-                new_M[i].append(row_1.dot_product(row_2))   # place the result into position i,j of the new matrix
-
-        return Matrix(new_M)
+            for row_2 in columns:                           # multiply each row of the 'self' matrix with each row of
+                new_M[i].append(row_1.dot_product(row_2))   # the transposed 'M' matrix and place the result into
+                                                            # position i,j of the new matrix
+        return Matrix(new_M, backend=self.backend)
 
     def scalar_mult(self, c):
         scaled_M = []
@@ -212,7 +244,7 @@ class Matrix(object):
             for j in range(self.n_dim):
                 scaled_M[i].append(c * self[i, j])
 
-        return Matrix(scaled_M)
+        return Matrix(scaled_M, backend=self.backend)
 
     def matrix_addition(self, M):
         self.test_same_size(M)
@@ -226,7 +258,7 @@ class Matrix(object):
             matrix_sum.append(row)
             row = []
 
-        return Matrix(matrix_sum)
+        return Matrix(matrix_sum, backend=self.backend)
 
     def test_same_size(self, M):
         try:
@@ -394,6 +426,15 @@ def test():
                 ])
     print(A.get_inverse())
 
+    # growth factor of the elimination, with and without partial pivoting
+    A = Matrix([[0.0001, 1, 0],
+                [1, 1, 0],
+                [0, 0, 1],
+                ], backend='float64')
+    for partial_pivoting in (False, True):
+        print(partial_pivoting, round(A.get_inverse(partial_pivoting=partial_pivoting).growth_factor, 4),
+              round(A.get_determinant(partial_pivoting=partial_pivoting)[1].growth_factor, 4))
+
 if __name__ == '__main__':
     test()
 